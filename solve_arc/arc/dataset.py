@@ -1,3 +1,4 @@
+from collections.abc import Mapping
 import collections
 import os
 import json
@@ -10,7 +11,8 @@ from ..language import Grid
 Task = collections.namedtuple("Task", ["train", "test"])
 Subtask = collections.namedtuple("Subtask", ["input", "output"])
 
-grid_schema = Schema(And([[int]], Use(Grid)))
+# colors are checked before grids store them as single bytes
+grid_schema = Schema(And([[And(int, lambda color: 0 <= color < 10)]], Use(Grid)))
 subtask_schema = Schema(
     And(
         {"input": grid_schema, "output": grid_schema},
@@ -41,3 +43,99 @@ def load_tasks(path):
 def load_file(path):
     raw_task = json.load(open(path, "r"))
     return task_schema.validate(raw_task)
+
+
+def compile_tasks(path, store_path):
+    """validate tasks in path once and write them to binary store
+
+    store consists of flat uint8 array of all grid cells (memory mapped when
+    loading) and an index of grid offsets and shapes per task
+    """
+    tasks = load_tasks(path)
+
+    task_ids = list(tasks.keys())
+    # grids of task in order train inputs and outputs, then test inputs and outputs
+    task_offsets = [0]
+    task_num_train = []
+    grid_offsets = [0]
+    grid_shapes = []
+    cells = []
+    for task in tasks.values():
+        for subtask in task.train + task.test:
+            for grid in subtask:
+                cells.append(grid.state.ravel())
+                grid_offsets.append(grid_offsets[-1] + grid.state.size)
+                grid_shapes.append(grid.shape)
+
+        task_offsets.append(len(grid_shapes))
+        task_num_train.append(len(task.train))
+
+    os.makedirs(store_path, exist_ok=True)
+    np.save(
+        os.path.join(store_path, "grids.npy"),
+        np.concatenate(cells) if len(cells) > 0 else np.zeros(0, dtype=np.uint8),
+    )
+    # index last, its presence marks store as complete
+    np.savez(
+        os.path.join(store_path, "index.npz"),
+        task_ids=np.array(task_ids),
+        task_offsets=np.array(task_offsets, dtype=np.int64),
+        task_num_train=np.array(task_num_train, dtype=np.int64),
+        grid_offsets=np.array(grid_offsets, dtype=np.int64),
+        grid_shapes=np.array(grid_shapes, dtype=np.int64).reshape(-1, 2),
+    )
+
+
+def is_compiled(path, store_path):
+    """check that store exists and is not older than tasks in path"""
+    index_path = os.path.join(store_path, "index.npz")
+    return os.path.exists(index_path) and os.path.getmtime(
+        index_path
+    ) >= os.path.getmtime(path)
+
+
+class TaskStore(Mapping):
+    """read-only mapping of task ids to tasks of compiled store
+
+    tasks are created lazily on first access, only the touched grids are read
+    """
+
+    def __init__(self, store_path):
+        with np.load(os.path.join(store_path, "index.npz")) as index:
+            self._task_offsets = index["task_offsets"]
+            self._task_num_train = index["task_num_train"]
+            self._grid_offsets = index["grid_offsets"]
+            self._grid_shapes = index["grid_shapes"]
+            task_ids = index["task_ids"]
+
+        self._task_index = {str(task_id): i for i, task_id in enumerate(task_ids)}
+        self._grids = np.load(os.path.join(store_path, "grids.npy"), mmap_mode="r")
+        self._tasks = {}
+
+    def __getitem__(self, task_id):
+        if task_id not in self._tasks:
+            self._tasks[task_id] = self._load_task(self._task_index[task_id])
+
+        return self._tasks[task_id]
+
+    def __iter__(self):
+        return iter(self._task_index)
+
+    def __len__(self):
+        return len(self._task_index)
+
+    def _load_task(self, index):
+        grids = [
+            self._load_grid(grid_index)
+            for grid_index in range(
+                self._task_offsets[index], self._task_offsets[index + 1]
+            )
+        ]
+        subtasks = [Subtask(*grids[i : i + 2]) for i in range(0, len(grids), 2)]
+        num_train = self._task_num_train[index]
+        return Task(train=subtasks[:num_train], test=subtasks[num_train:])
+
+    def _load_grid(self, grid_index):
+        start, end = self._grid_offsets[grid_index : grid_index + 2]
+        # read-only view into memory mapped store, no copy
+        return Grid(self._grids[start:end].reshape(self._grid_shapes[grid_index]))
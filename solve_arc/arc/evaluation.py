@@ -1,16 +1,18 @@
 from itertools import islice
 from datetime import datetime
+from functools import partial
 from statistics import mean
 import logging
+import time
 
 from func_timeout import func_timeout, FunctionTimedOut
 import click
 
-from .loader import training_tasks, evaluation_tasks
+from .loader import training_tasks, evaluation_tasks, all_tasks
 from .task_ids import SOLVED_TASK_IDS, REGRESSION_TASK_IDS
+from .task_runner import run_tasks, Journal
 from ..function_graph_solver.solver import solve, Constraint, Statistics
 
-
 logging.basicConfig(format="%(message)s", level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -22,6 +24,13 @@ logger = logging.getLogger(__name__)
 @click.option("--max-depth", default=5)
 @click.option("--max-usages", default=10)
 @click.option("--max-steps", default=50000)
+@click.option("--expand-workers", default=None, type=int)
+@click.option("--portfolio-size", default=None, type=int)
+@click.option("--subset-size", default=None, type=int)
+@click.option("--workers", default=None, type=int)
+@click.option("--journal", default=None, type=click.Path(dir_okay=False))
+@click.option("--resume/--no-resume", default=False)
+@click.option("--max-memory-mb", default=None, type=int)
 @click.argument("args", nargs=-1)
 def evaluate(debug, args, **kwargs):
     if debug:
@@ -62,46 +71,129 @@ def _get_all_tasks(except_task_ids=tuple()):
     return [(task_id, all_tasks()[task_id]) for task_id in task_ids]
 
 
-def _evaluate(tasks, max_seconds_per_task=10, **kwargs):
-    score = 0
-    solved = []
-    statistics = []
+def _evaluate(
+    tasks,
+    max_seconds_per_task=10,
+    workers=None,
+    journal=None,
+    resume=False,
+    max_memory_mb=None,
+    **kwargs
+):
+    tasks = list(tasks)
+    journal = Journal(journal) if journal else None
+
+    results = []
+    if journal is not None and resume:
+        task_ids = set(task_id for task_id, _ in tasks)
+        results = [
+            result
+            for task_id, result in journal.results().items()
+            if task_id in task_ids
+        ]
+        done = set(result["task_id"] for result in results)
+        logger.info("resuming, skipping {} journaled tasks".format(len(done)))
+        tasks = [(task_id, task) for task_id, task in tasks if task_id not in done]
+
     start_time = datetime.now()
-    for task_id, (train_subtasks, test_subtasks) in tasks:
-        logger.info("solving {}".format(task_id))
-        constraints = [Constraint(*subtask) for subtask in train_subtasks]
-
-        try:
-            solution = timeout(
-                timeout=max_seconds_per_task,
-                func=solve,
-                args=(constraints,),
-                kwargs=kwargs,
-            )
-            if solution is not None:
-                statistics.append(solution.statistics)
-                valid = check_solution(solution, train_subtasks)
-                if valid:
-                    score += 1
-                    solved.append(task_id)
-                    logger.info("found valid solution: {}".format(solution))
-                else:
-                    logger.info("found invalid solution: {}".format(solution))
-            else:
-                logger.info("no solution")
-
-        except FunctionTimedOut:
-            logger.info("timeout")
+    solve_task = partial(_solve_task, kwargs=kwargs)
+    if workers:
+        task_results = run_tasks(
+            tasks, solve_task, workers, max_seconds_per_task, max_memory_mb
+        )
+    else:
+        task_results = (
+            _solve_task_with_timeout(task_id, task, max_seconds_per_task, kwargs)
+            for task_id, task in tasks
+        )
+
+    for result in task_results:
+        _log_result(result)
+        if journal is not None:
+            journal.append(result)
+        results.append(result)
+
+    solved = [result["task_id"] for result in results if result["solved"]]
+    score = len(solved)
+    statistics = [
+        Statistics(**result["statistics"])
+        for result in results
+        if result["statistics"] is not None
+    ]
 
     logger.info("solved: {}".format(", ".join(solved)))
     logger.info("elapsed time: {}".format(datetime.now() - start_time))
     if len(statistics) > 0:
         logger.info("statistics mean: {!s}".format(reduce_statistics(statistics, mean)))
-    logger.info("score: {}/{} ({})".format(score, len(tasks), (1 - score / len(tasks))))
+    logger.info(
+        "score: {}/{} ({})".format(score, len(results), (1 - score / len(results)))
+    )
 
     return solved
 
 
+def _solve_task_with_timeout(task_id, task, max_seconds_per_task, kwargs):
+    start = time.monotonic()
+    try:
+        return timeout(
+            timeout=max_seconds_per_task,
+            func=_solve_task,
+            args=(task_id, task),
+            kwargs={"kwargs": kwargs},
+        )
+    except FunctionTimedOut:
+        return _result(task_id, "timeout", start)
+
+
+def _solve_task(task_id, task, kwargs):
+    """solve task and summarize as json serializable result"""
+    logger.info("solving {}".format(task_id))
+    start = time.monotonic()
+    train_subtasks, test_subtasks = task
+    constraints = [Constraint(*subtask) for subtask in train_subtasks]
+
+    solution = solve(constraints, **kwargs)
+    if solution is None:
+        return _result(task_id, "no_solution", start)
+
+    valid = check_solution(solution, train_subtasks)
+    return _result(
+        task_id,
+        "solved" if valid else "invalid",
+        start,
+        solution=str(solution),
+        statistics=solution.statistics,
+    )
+
+
+def _result(task_id, status, start, solution=None, statistics=None):
+    return {
+        "task_id": task_id,
+        "status": status,
+        "solved": status == "solved",
+        "solution": solution,
+        "elapsed": time.monotonic() - start,
+        "statistics": statistics._asdict() if statistics is not None else None,
+    }
+
+
+def _log_result(result):
+    if result["status"] == "solved":
+        logger.info(
+            "{}: found valid solution: {}".format(result["task_id"], result["solution"])
+        )
+    elif result["status"] == "invalid":
+        logger.info(
+            "{}: found invalid solution: {}".format(
+                result["task_id"], result["solution"]
+            )
+        )
+    elif result["status"] == "no_solution":
+        logger.info("{}: no solution".format(result["task_id"]))
+    else:
+        logger.info("{}: {}".format(result["task_id"], result["status"]))
+
+
 def reduce_statistics(statistics, func):
     return Statistics(
         *[
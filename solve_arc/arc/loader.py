@@ -1,14 +1,22 @@
-from .dataset import load_tasks
+from collections import ChainMap
+import logging
+import os
+
+from .dataset import load_tasks, compile_tasks, is_compiled, TaskStore
+
+logger = logging.getLogger(__name__)
 
 _training_tasks = None
 _evaluation_tasks = None
 
+COMPILED_PATH = "compiled_dataset"
+
 
 def training_tasks():
     # use singleton to avoid reloading dataset (which takes long)
     global _training_tasks
     if _training_tasks is None:
-        _training_tasks = load_tasks("dataset/data/training")
+        _training_tasks = _load("dataset/data/training", "training")
 
     return _training_tasks
 
@@ -17,10 +25,27 @@ def evaluation_tasks():
     # use singleton to avoid reloading dataset (which takes long)
     global _evaluation_tasks
     if _evaluation_tasks is None:
-        _evaluation_tasks = load_tasks("dataset/data/evaluation")
+        _evaluation_tasks = _load("dataset/data/evaluation", "evaluation")
 
     return _evaluation_tasks
 
 
 def all_tasks():
-    return {**training_tasks(), **evaluation_tasks()}
+    # chain instead of merging to keep tasks of compiled stores lazy
+    return ChainMap(training_tasks(), evaluation_tasks())
+
+
+def _load(path, name):
+    """load tasks from compiled store, compile store once if missing or outdated"""
+    store_path = os.path.join(COMPILED_PATH, name)
+    try:
+        if not is_compiled(path, store_path):
+            logger.info("compiling {} to {}".format(path, store_path))
+            compile_tasks(path, store_path)
+
+        return TaskStore(store_path)
+
+    except OSError:
+        # i.e. read-only file system
+        logger.warning("failed to compile {}, loading json files".format(path))
+        return load_tasks(path)
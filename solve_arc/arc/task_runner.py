@@ -0,0 +1,115 @@
+"""
+run tasks in separate processes with hard wall-clock and memory limits,
+and journal their results for resuming interrupted runs
+"""
+
+from multiprocessing.connection import wait
+import json
+import multiprocessing
+import resource
+import time
+import traceback
+
+
+def run_tasks(tasks, func, workers, max_seconds=None, max_memory_mb=None):
+    """run func(task_id, task) for all tasks in up to <workers> processes
+
+    yields result dicts (as returned by func) as tasks finish, tasks exceeding
+    max_seconds are killed, tasks exceeding max_memory_mb fail with memory error
+    """
+    pending = list(tasks)
+    pending.reverse()
+    running = {}
+
+    while len(pending) > 0 or len(running) > 0:
+        while len(pending) > 0 and len(running) < workers:
+            task_id, task = pending.pop()
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=_run_task,
+                args=(sender, func, task_id, task, max_memory_mb),
+                daemon=True,
+            )
+            process.start()
+            # only child process writes
+            sender.close()
+            running[receiver] = (process, task_id, time.monotonic())
+
+        for receiver in wait(list(running.keys()), timeout=0.1):
+            process, task_id, start = running.pop(receiver)
+            try:
+                result = receiver.recv()
+            except EOFError:
+                # process died without result (i.e. killed by os)
+                result = _failed(task_id, "error", start)
+            receiver.close()
+            process.join()
+            yield result
+
+        if max_seconds:
+            now = time.monotonic()
+            for receiver, (process, task_id, start) in list(running.items()):
+                if now - start > max_seconds:
+                    process.kill()
+                    process.join()
+                    receiver.close()
+                    del running[receiver]
+                    yield _failed(task_id, "timeout", start)
+
+
+def _run_task(sender, func, task_id, task, max_memory_mb):
+    start = time.monotonic()
+    if max_memory_mb:
+        # limit address space, as resident memory can not be limited directly
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    try:
+        result = func(task_id, task)
+    except MemoryError:
+        result = _failed(task_id, "memory", start)
+    except Exception:
+        traceback.print_exc()
+        result = _failed(task_id, "error", start)
+
+    sender.send(result)
+    sender.close()
+
+
+def _failed(task_id, status, start):
+    return {
+        "task_id": task_id,
+        "status": status,
+        "solved": False,
+        "solution": None,
+        "elapsed": time.monotonic() - start,
+        "statistics": None,
+    }
+
+
+class Journal:
+    """append-only json lines file with one result per task"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def results(self):
+        """results by task id, last result wins for repeated tasks"""
+        results = {}
+        try:
+            with open(self.path, "r") as journal:
+                for line in journal:
+                    # ignore partially written line of interrupted run
+                    try:
+                        result = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    results[result["task_id"]] = result
+        except FileNotFoundError:
+            pass
+
+        return results
+
+    def append(self, result):
+        with open(self.path, "a") as journal:
+            journal.write(json.dumps(result) + "\n")
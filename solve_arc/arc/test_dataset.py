@@ -9,3 +9,41 @@ def test_load_tasks():
     assert task.train[0].output.shape == (3, 3)
     assert task.test[0].input.shape == (3, 7)
     assert task.test[0].output.shape == (3, 3)
+
+
+def test_task_store(tmp_path):
+    store_path = str(tmp_path / "store")
+    assert not is_compiled("solve_arc/arc/test_data", store_path)
+
+    compile_tasks("solve_arc/arc/test_data", store_path)
+
+    assert is_compiled("solve_arc/arc/test_data", store_path)
+    expected = load_tasks("solve_arc/arc/test_data")
+    store = TaskStore(store_path)
+    assert list(store.keys()) == list(expected.keys())
+
+    for task_id in expected.keys():
+        assert len(store[task_id].train) == len(expected[task_id].train)
+        assert len(store[task_id].test) == len(expected[task_id].test)
+        for subtask, expected_subtask in zip(
+            store[task_id].train + store[task_id].test,
+            expected[task_id].train + expected[task_id].test,
+        ):
+            assert subtask.input == expected_subtask.input
+            assert subtask.output == expected_subtask.output
+
+
+def test_task_store__lazy(tmp_path):
+    store_path = str(tmp_path / "store")
+    compile_tasks("solve_arc/arc/test_data", store_path)
+
+    store = TaskStore(store_path)
+    assert len(store) == 1
+    assert len(store._tasks) == 0
+
+    task = store["0520fde7"]
+
+    assert store["0520fde7"] is task
+    assert task.train[0].input.shape == (3, 7)
+    # grids are views into memory mapped store
+    assert np.shares_memory(task.train[0].input.state, store._grids)
@@ -0,0 +1,53 @@
+import time
+
+from .task_runner import *
+
+
+def _echo(task_id, task):
+    if task == "sleep":
+        time.sleep(10)
+    if task == "fail":
+        raise ValueError()
+
+    return {"task_id": task_id, "solved": True, "solution": task}
+
+
+def test_run_tasks():
+    tasks = [("a", "x"), ("b", "y"), ("c", "z")]
+
+    results = list(run_tasks(tasks, _echo, workers=2))
+
+    assert sorted(result["task_id"] for result in results) == ["a", "b", "c"]
+    assert all(result["solved"] for result in results)
+
+
+def test_run_tasks__timeout_and_error():
+    tasks = [("a", "sleep"), ("b", "fail"), ("c", "x")]
+
+    start = time.monotonic()
+    results = {
+        result["task_id"]: result
+        for result in run_tasks(tasks, _echo, workers=3, max_seconds=0.5)
+    }
+
+    assert time.monotonic() - start < 5
+    assert results["a"]["status"] == "timeout"
+    assert results["b"]["status"] == "error"
+    assert results["c"]["solved"]
+
+
+def test_journal(tmp_path):
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+    assert journal.results() == {}
+
+    journal.append({"task_id": "a", "solved": False})
+    journal.append({"task_id": "b", "solved": True})
+    journal.append({"task_id": "a", "solved": True})
+    # partial line of interrupted run
+    with open(journal.path, "a") as f:
+        f.write('{"task_id": "c", "sol')
+
+    results = journal.results()
+
+    assert sorted(results.keys()) == ["a", "b"]
+    assert results["a"]["solved"]
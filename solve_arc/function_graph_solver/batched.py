@@ -0,0 +1,129 @@
+"""
+batched kernels of operations, which process stacked states of all constraints
+(arrays of shape (n, height, width)) at once with a single numpy call
+
+kernels return stacked states of results and a boolean array of shape (n,)
+with the validity of each result (or None if all are valid)
+"""
+
+import numpy as np
+
+from ..language import *
+from ..language.logic import _EQUAL_AND, _EQUAL_OR, _XOR
+
+# operation -> (result type, argument types, kernel), argument type None for scalars
+kernels = {}
+
+
+def _kernel(operation):
+    """register kernel for operation with signature of operation in registry"""
+    signature = operations[operation]
+    arg_types = tuple(
+        None if arg_type is Color else arg_type for arg_type in signature.arg_types
+    )
+
+    def decorator(kernel):
+        kernels[operation] = (signature.result_type, arg_types, kernel)
+        return kernel
+
+    return decorator
+
+
+@_kernel(switch_color)
+def _switch_color(grids, a, b):
+    return switch_color_table(a, b)[grids], None
+
+
+@_kernel(map_color)
+def _map_color(grids, from_, to):
+    return map_color_table(from_, to)[grids], None
+
+
+@_kernel(map_color_in_selection)
+def _map_color_in_selection(grids, selections, from_, to):
+    return np.where(selections, map_color_table(from_, to)[grids], grids), None
+
+
+@_kernel(set_selected_to_color)
+def _set_selected_to_color(grids, selections, color):
+    return np.where(selections, color, grids), None
+
+
+@_kernel(flip_up_down)
+def _flip_up_down(grids):
+    return grids[:, ::-1, :], None
+
+
+@_kernel(flip_left_right)
+def _flip_left_right(grids):
+    return grids[:, :, ::-1], None
+
+
+@_kernel(rotate_90)
+def _rotate_90(grids):
+    return np.rot90(grids, k=1, axes=(1, 2)), None
+
+
+@_kernel(rotate_180)
+def _rotate_180(grids):
+    return np.rot90(grids, k=2, axes=(1, 2)), None
+
+
+@_kernel(rotate_270)
+def _rotate_270(grids):
+    return np.rot90(grids, k=3, axes=(1, 2)), None
+
+
+@_kernel(select_color)
+def _select_color(grids, color):
+    return grids == color, None
+
+
+@_kernel(select_all_colors)
+def _select_all_colors(grids, ignore=0):
+    return grids != ignore, None
+
+
+def _apply_lookup_table(lookup_table, a, b):
+    values, valid = lookup_table
+    return values[a, b], np.all(valid[a, b], axis=(1, 2))
+
+
+@_kernel(elementwise_equal_and)
+def _elementwise_equal_and(a, b):
+    return _apply_lookup_table(_EQUAL_AND, a, b)
+
+
+@_kernel(elementwise_equal_or)
+def _elementwise_equal_or(a, b):
+    return _apply_lookup_table(_EQUAL_OR, a, b)
+
+
+@_kernel(elementwise_xor)
+def _elementwise_xor(a, b):
+    return _apply_lookup_table(_XOR, a, b)
+
+
+@_kernel(selection_elementwise_and)
+def _selection_elementwise_and(a, b):
+    return a & b, None
+
+
+@_kernel(selection_elementwise_or)
+def _selection_elementwise_or(a, b):
+    return a | b, None
+
+
+@_kernel(selection_elementwise_xor)
+def _selection_elementwise_xor(a, b):
+    return a ^ b, None
+
+
+@_kernel(selection_elementwise_eq)
+def _selection_elementwise_eq(a, b):
+    return a == b, None
+
+
+@_kernel(selection_elementwise_not)
+def _selection_elementwise_not(selections):
+    return ~selections, None
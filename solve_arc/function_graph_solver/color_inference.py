@@ -0,0 +1,65 @@
+"""
+static inference of used colors to prune functions before evaluation, whose result
+can not have the colors of the target
+"""
+
+from ..language import *
+from .vectorize import Vector, palettes
+
+
+class ColorPruning:
+    """check for function memo, if function of operation and argument nodes is doomed
+
+    colors can be added (i.e. by combining with other grid) or removed (i.e. by
+    extracting area) in a single step, so only functions at max depth, which need
+    to be the target, are rejected if they can not have the colors of the target
+    """
+
+    def __init__(self, target, max_depth):
+        self.target_palettes = palettes(target)
+        self.max_depth = max_depth
+
+    def __call__(self, operation, args):
+        signature = operations.get(getattr(operation, "func", None))
+        if signature is None or signature.infer_colors is None:
+            return False
+
+        if 1 + max(arg.depth for arg in args) < self.max_depth:
+            return False
+
+        arg_colors = [_arg_colors(arg()) for arg in args]
+        for elements, target_palette in zip(zip(*arg_colors), self.target_palettes):
+            colors = signature.infer_colors(*elements)
+            if colors is None:
+                return True
+
+            if colors is not UNKNOWN_COLORS and colors != target_palette:
+                return True
+
+        return False
+
+
+def abstract_colors(element):
+    """used colors of grid, tuple of them for sequences, value for scalars"""
+    if isinstance(element, Grid):
+        return frozenset(element.used_colors())
+
+    if isinstance(element, Selection):
+        return UNKNOWN_COLORS
+
+    if isinstance(element, (Grids, Selections)):
+        return tuple(abstract_colors(item) for item in element)
+
+    return element
+
+
+def _arg_colors(value):
+    if not isinstance(value, Vector):
+        # scalar value repeated for all constraints
+        return value
+
+    # use cached used colors of grids
+    return tuple(
+        palette if palette is not None else abstract_colors(element)
+        for element, palette in zip(value, value.palettes)
+    )
@@ -6,14 +6,20 @@ from itertools import (
     permutations,
     count,
 )
+from concurrent.futures import ProcessPoolExecutor
 from statistics import mean
 import logging
+import pickle
 import random
 
 from ..language import *
-from .nodes import Function, Constant
+from .nodes import Function, Constant, FunctionMemo, INVALID
+from . import node_collection
 from .vectorize import *
-from .loss import loss
+from .loss import static_loss, usages_loss
+from .weighted_sampler import WeightedSampler
+from .shape_inference import ShapePruning
+from .color_inference import ColorPruning
 
 logger = logging.getLogger(__name__)
 
@@ -26,24 +32,48 @@ class Graph:
         max_depth=10,
         max_usages=10,
         expand_batch_size=1000,
+        expand_workers=None,
+        verify=None,
         **kwargs
     ):
         self.target = target
+        # optional check of nodes matching target, i.e. on constraints not in target
+        self.verify = verify
         self.max_depth = max_depth
         self.max_usages = max_usages
         self.expand_batch_size = expand_batch_size
+        # opt-in: generate functions in process pool with this number of workers
+        self.expand_workers = expand_workers
+        self._executor = None
 
         self.random = random.Random(0)  # seed for determinism
 
+        # create functions through memo to avoid reevaluating identical functions
+        # and to reject functions not leading to target without evaluation
+        self.function = FunctionMemo(
+            is_valid, track_usages=True, prune=_static_pruning(target, max_depth)
+        )
+
         # all nodes that have been generated, for checking for new nodes
         self.nodes = set()
 
         # count nodes that have already been expanded
         self.expandable_nodes = set()
 
+        # expandable nodes weighted by likelihood, updated when usages change
+        self._static_losses = {}
+        self._candidates = WeightedSampler()
+
         self._process(initial_nodes)
 
     def solve(self):
+        if self.expand_workers:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.expand_workers,
+                initializer=_initialize_worker,
+                initargs=(self.target, self.max_depth),
+            )
+
         try:
             for _ in count():
                 solution = self._expand()
@@ -54,13 +84,20 @@ class Graph:
         except NoExpandableNodes:
             logger.debug("no futher graph expansion possible")
 
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
         return None
 
     def _expand(self):
-        candidates, likelihoods = self._get_sample_candidates_with_likelihoods()
-        sample_size = min(len(candidates), self.expand_batch_size)
+        if self._candidates.num_positive == 0:
+            raise NoExpandableNodes()
+
+        sample_size = min(self._candidates.num_positive, self.expand_batch_size)
         expand_next = NodeCollection(
-            self.random.choices(candidates, weights=likelihoods, k=sample_size)
+            self._candidates.choices(self.random, k=sample_size)
         )
         logger.debug(
             "expand %d nodes (Grid: %d, Grids: %d, Selection: %d, Selections: %d)",
@@ -71,39 +108,96 @@ class Graph:
             len(expand_next.of_type(Selections)),
         )
 
-        new_nodes = generate_functions(expand_next, self) - self.nodes
+        if self._executor is not None:
+            new_nodes = self._generate_functions_parallel(expand_next) - self.nodes
+        else:
+            new_nodes = generate_functions(expand_next, self) - self.nodes
 
         logger.debug(
-            "new nodes: %d",
+            "new nodes: %d (memo hits: %d, misses: %d, pruned: %d)",
             len(new_nodes),
+            self.function.hits,
+            self.function.misses,
+            self.function.pruned,
         )
 
+        # only nodes used as args changed usages
+        for node in self.function.pop_used_args():
+            if node in self._candidates:
+                self._candidates.update(node, self._likelihood(node))
+
         return self._process(new_nodes)
 
-    def _get_sample_candidates_with_likelihoods(self):
-        candidates = [
-            node for node in self.expandable_nodes if node.usages <= self.max_usages
-        ]
+    def _generate_functions_parallel(self, nodes):
+        """generate functions for each generator family in worker processes
+
+        workers get a snapshot of the node values and return records of
+        evaluated functions, which are merged through the function memo
+        """
+        batch = list(nodes)
+        grid_nodes = set(nodes.of_type(Grid))
+        snapshot = pickle.dumps(
+            [
+                (
+                    node(),
+                    getattr(node, "operation", None),
+                    node.depth,
+                    # chains are cut off in snapshot, so provide them upfront
+                    (
+                        (color_chain(node), symmetry_chain(node))
+                        if node in grid_nodes
+                        else (None, None)
+                    ),
+                )
+                for node in batch
+            ]
+        )
+        records = self._executor.map(
+            _generate_in_worker, generators, [snapshot] * len(generators)
+        )
 
-        if len(candidates) == 0:
-            raise NoExpandableNodes()
+        functions = set()
+        for family_records in records:
+            for record in family_records:
+                functions.add(self._insert_record(record, batch))
 
-        def likelihood(node):
-            min_likelihood = 0.1
-            return min_likelihood + (1 / loss(node, self.target))
+        functions.discard(INVALID)
+        return functions
 
-        likelihoods = [likelihood(node) for node in candidates]
-        assert not np.isinf(likelihoods).any()
+    def _insert_record(self, record, batch):
+        operation, arg_specs, value = record
+        args = []
+        for kind, content in arg_specs:
+            if kind == "node":
+                args.append(batch[content])
+            elif kind == "constant":
+                args.append(Constant(content))
+            else:
+                args.append(self._insert_record(content, batch))
 
-        return candidates, likelihoods
+        return self.function.with_value(value, operation, *args)
+
+    def _likelihood(self, node):
+        if node.usages > self.max_usages:
+            return 0
+
+        min_likelihood = 0.1
+        return min_likelihood + (1 / (self._static_losses[node] * usages_loss(node)))
 
     def _process(self, new_nodes):
         self.nodes |= new_nodes
-        self.expandable_nodes |= {
+        expandable_nodes = {
             node
             for node in new_nodes
             if is_valid(node()) and node.depth < self.max_depth
         }
+        self.expandable_nodes |= expandable_nodes
+
+        for node in expandable_nodes:
+            # distance to target never changes, only compute once
+            self._static_losses[node] = static_loss(node, self.target)
+            if self._static_losses[node] > 0:
+                self._candidates.add(node, self._likelihood(node))
         logger.debug(
             "total expandable: %d, total nodes: %d",
             len(self.expandable_nodes),
@@ -112,7 +206,7 @@ class Graph:
 
         # check for solution
         for node in new_nodes:
-            if node() == self.target:
+            if node() == self.target and (self.verify is None or self.verify(node)):
                 return node
 
         return None
@@ -122,65 +216,109 @@ class NoExpandableNodes(Exception):
     pass
 
 
-@reduce_all
-def is_valid(value):
-    return value is not None
+def _static_pruning(target, max_depth):
+    return ShapePruning(target, max_depth), ColorPruning(target, max_depth)
 
 
-class NodeCollection(set):
-    def __init__(self, iterable):
-        super().__init__(iterable)
-        self._filter_by_type(iterable)
+class NodeCollection(node_collection.NodeCollection):
+    """nodes indexed by type, shape, height, width and sequence length"""
 
-    def _filter_by_type(self, nodes):
-        by_type = defaultdict(set)
-        for node in nodes:
-            vector_iter = iter(node())
-            type_ = type(next(vector_iter))
-            # only valid if all are equal
-            if all(type_ == type(element) for element in vector_iter):
-                by_type[type_].add(node)
+    def of_type(self, type_):
+        return self.with_type(type_)
 
-        self._by_type = by_type
 
-    def of_type(self, type_):
-        return self._by_type[type_]
+def matching_shape_pairs(nodes, type_a, type_b):
+    """pairs of nodes of given types with equal shape, joined through shape index"""
+    for shape_ in list(nodes.with_shape.values):
+        nodes_with_shape = nodes.with_shape(shape_)
+        for node_a in nodes_with_shape & nodes.of_type(type_a):
+            for node_b in nodes_with_shape & nodes.of_type(type_b):
+                yield node_a, node_b
+
+
+def grouped_by(nodes, with_property):
+    """subsets of nodes with equal property, joined through property index"""
+    for value in list(with_property.values):
+        group = nodes & with_property(value)
+        if len(group) > 0:
+            yield group
 
 
 def generate_functions(nodes, graph):
-    functions = (
-        set()
-        | map_color_functions(nodes, graph)
-        | map_color_in_selection_functions(nodes, graph)
-        | switch_color_functions(nodes, graph)
-        | set_selected_to_color_functions(nodes, graph)
-        | select_color_functions(nodes, graph)
-        | select_all_colors_functions(nodes, graph)
-        | split_selection_into_connected_areas_functions(nodes, graph)
-        | filter_selections_functions(nodes, graph)
-        | merge_selections_functions(nodes, graph)
-        | extend_selection_to_bounds_functions(nodes, graph)
-        | extend_selections_to_bounds_functions(nodes, graph)
-        | extract_selected_area_functions(nodes, graph)
-        | extract_selected_areas_functions(nodes, graph)
-        | extract_islands_functions(nodes, graph)
-        | extract_color_patches_functions(nodes, graph)
-        | extract_color_patch_functions(nodes, graph)
-        | concatenate_functions(nodes, graph)
-        | concatenate_sequence_functions(nodes, graph)
-        | split_functions(nodes, graph)
-        | logic_functions(nodes, graph)
-        | symmetry_functions(nodes, graph)
-        | take_functions(nodes, graph)
-        | sort_by_area_functions(nodes, graph)
-        | select_color_functions(nodes, graph)
-    )
+    functions = set()
+    for generator in generators:
+        functions |= generator(nodes, graph)
+
+    functions.discard(INVALID)
     return functions
 
 
+def signature_functions(nodes, graph):
+    functions = set()
+    for function in signature_operations:
+        operation = operations[function]
+        for args in signature_args(nodes, operation):
+            functions.add(graph.function(vectorize(function), *args))
+    return functions
+
+
+# operations without scalar arguments or heuristics, candidates follow from signature
+signature_operations = [
+    split_selection_into_connected_areas,
+    split_selection_into_connected_areas_no_diagonals,
+    split_selection_into_connected_areas_skip_gaps,
+    filter_selections_touching_edge,
+    filter_selections_not_touching_edge,
+    extend_selection_to_bounds,
+    extend_selections_to_bounds,
+    take_first,
+    take_last,
+    take_grid_with_unique_colors,
+    sort_by_area,
+    flip_up_down_within_bounds,
+    flip_left_right_within_bounds,
+    rotate_90_within_bounds,
+    rotate_180_within_bounds,
+    rotate_270_within_bounds,
+]
+
+
+def signature_args(nodes, operation):
+    """all argument combinations of nodes with types of signature
+
+    operations with multiple arguments need to require same shape of all arguments
+    """
+    if len(operation.arg_types) == 1:
+        return (
+            (node,)
+            for type_ in alternatives(operation.arg_types[0])
+            for node in nodes.of_type(type_)
+        )
+
+    if operation.preconditions != (same_shape,):
+        raise ValueError("no candidates for signature of {}".format(operation))
+
+    return (
+        args
+        for shape_ in list(nodes.with_shape.values)
+        for args in product(
+            *(
+                nodes.with_shape(shape_) & nodes.of_type(type_)
+                for type_ in operation.arg_types
+            )
+        )
+    )
+
+
 def map_color_functions(nodes, graph):
-    return {
-        Function(vectorize(map_color), node, Constant(repeat(a)), Constant(repeat(b)))
+    return _distinct_color_tables(
+        (
+            node,
+            map_color_table(a, b),
+            lambda node=node, a=a, b=b: graph.function(
+                vectorize(map_color), node, Constant(repeat(a)), Constant(repeat(b))
+            ),
+        )
         for node in nodes.of_type(Grid)
         for a, b in product(
             used_colors(node()),
@@ -188,12 +326,12 @@ def map_color_functions(nodes, graph):
             used_colors(graph.target),
         )
         if a != b
-    }
+    )
 
 
 def map_color_in_selection_functions(nodes, graph):
     return {
-        Function(
+        graph.function(
             vectorize(map_color_in_selection),
             grid_node,
             selection_node,
@@ -201,47 +339,91 @@ def map_color_in_selection_functions(nodes, graph):
             Constant(repeat(0)),
             Constant(repeat(color)),
         )
-        for grid_node, selection_node in product(
-            nodes.of_type(Grid), nodes.of_type(Selection)
-        )
-        if shape(grid_node()) == shape(selection_node())
+        for grid_node, selection_node in matching_shape_pairs(nodes, Grid, Selection)
         # heuristic: only map to colors used in target
         for color in used_colors(graph.target)
     }
 
 
 def switch_color_functions(nodes, graph):
-    return {
-        Function(
-            vectorize(switch_color), node, Constant(repeat(a)), Constant(repeat(b))
+    return _distinct_color_tables(
+        (
+            node,
+            switch_color_table(a, b),
+            lambda node=node, a=a, b=b: graph.function(
+                vectorize(switch_color), node, Constant(repeat(a)), Constant(repeat(b))
+            ),
         )
         for node in nodes.of_type(Grid)
-        if not (
-            isinstance(node, Function) and node.operation == vectorize(switch_color)
-        )
+        if not getattr(node, "operation", None) == vectorize(switch_color)
         for a, b in combinations(used_colors(node()), 2)
-    }
+    )
+
+
+def _distinct_color_tables(candidates):
+    """create functions of color remapping candidates (node, table, create function)
+
+    chains of color remappings are composed into a single table of their first
+    argument, candidates which do not change any color of it or remap its colors
+    like another candidate are skipped without evaluating them
+    """
+    functions = set()
+    seen = set()
+    for node, table, create_function in candidates:
+        base_key, colors, base_table = color_chain(node)
+        remapped = tuple(compose_color_tables(base_table, table)[list(colors)])
+        if remapped == colors or (base_key, remapped) in seen:
+            continue
+
+        seen.add((base_key, remapped))
+        functions.add(create_function())
+
+    return functions
+
+
+_color_operations = {
+    vectorize(map_color): map_color_table,
+    vectorize(switch_color): switch_color_table,
+}
+
+
+def color_chain(node):
+    """chain of color remappings ending in grid node
+
+    returns key of first node of chain, used colors of first node and composed
+    table of chain
+    """
+    if isinstance(node, _SnapshotNode):
+        return node.color_chain
+
+    table = color_table()
+    while getattr(node, "operation", None) in _color_operations and all(
+        isinstance(arg, Constant) and isinstance(arg.value, repeat)
+        for arg in node.args[1:]
+    ):
+        colors = (arg.value.value for arg in node.args[1:])
+        table = compose_color_tables(_color_operations[node.operation](*colors), table)
+        node = node.args[0]
+
+    return id(node), tuple(sorted(all_used_colors(node()))), table
 
 
 def set_selected_to_color_functions(nodes, graph):
     return {
-        Function(
+        graph.function(
             vectorize(set_selected_to_color),
             grid_node,
             selection_node,
             Constant(repeat(color)),
         )
-        for grid_node, selection_node in product(
-            nodes.of_type(Grid), nodes.of_type(Selection)
-        )
-        if shape(grid_node()) == shape(selection_node())
+        for grid_node, selection_node in matching_shape_pairs(nodes, Grid, Selection)
         for color in used_colors(graph.target)
     }
 
 
 def select_color_functions(nodes, graph):
     return {
-        Function(vectorize(select_color), node, Constant(repeat(color)))
+        graph.function(vectorize(select_color), node, Constant(repeat(color)))
         for node in nodes.of_type(Grid)
         for color in used_colors(node())
     }
@@ -249,7 +431,7 @@ def select_color_functions(nodes, graph):
 
 def select_all_colors_functions(nodes, graph):
     return {
-        Function(vectorize(select_all_colors), node, Constant(repeat(color)))
+        graph.function(vectorize(select_all_colors), node, Constant(repeat(color)))
         for node in nodes.of_type(Grid)
         for color in used_colors(node())
         # 2 colors or less is covered by select_color_functions
@@ -257,77 +439,36 @@ def select_all_colors_functions(nodes, graph):
     }
 
 
-def split_selection_into_connected_areas_functions(nodes, graph):
-    functions = set()
-    for node in nodes.of_type(Selection):
-        functions.add(Function(vectorize(split_selection_into_connected_areas), node))
-        functions.add(
-            Function(vectorize(split_selection_into_connected_areas_no_diagonals), node)
-        )
-        functions.add(
-            Function(vectorize(split_selection_into_connected_areas_skip_gaps), node)
-        )
-    return functions
-
-
-def filter_selections_functions(nodes, graph):
-    functions = set()
-    for node in nodes.of_type(Selections):
-        functions.add(Function(vectorize(filter_selections_touching_edge), node))
-        functions.add(Function(vectorize(filter_selections_not_touching_edge), node))
-    return functions
-
-
 def merge_selections_functions(nodes, graph):
     return {
-        Function(vectorize(merge_selections), selections_node)
+        graph.function(vectorize(merge_selections), selections_node)
         for selections_node in nodes.of_type(Selections)
         if is_matching_shape(selections_node())
     }
 
 
-def extend_selection_to_bounds_functions(nodes, graph):
-    return {
-        Function(vectorize(extend_selection_to_bounds), selection_node)
-        for selection_node in nodes.of_type(Selection)
-    }
-
-
-def extend_selections_to_bounds_functions(nodes, graph):
-    return {
-        Function(vectorize(extend_selections_to_bounds), selection_node)
-        for selection_node in nodes.of_type(Selections)
-    }
-
-
 def extract_selected_area_functions(nodes, graph):
     return {
-        Function(vectorize(extract_selected_area), grid_node, selection_node)
-        for grid_node, selection_node in product(
-            nodes.of_type(Grid), nodes.of_type(Selection)
-        )
-        if shape(grid_node()) == shape(selection_node())
+        graph.function(vectorize(extract_selected_area), grid_node, selection_node)
+        for grid_node, selection_node in matching_shape_pairs(nodes, Grid, Selection)
         # heuristic: if target has different shape
-        and shape(grid_node()) != shape(graph.target)
+        if shape(grid_node()) != shape(graph.target)
     }
 
 
 def extract_selected_areas_functions(nodes, graph):
     return {
-        Function(vectorize(extract_selected_areas), grid_node, selections_node)
-        for grid_node, selections_node in product(
-            nodes.of_type(Grid), nodes.of_type(Selections)
-        )
-        # can only process nodes ofs length 2 further
-        if is_matching_shape(append(selections_node(), grid_node()))
+        graph.function(vectorize(extract_selected_areas), grid_node, selections_node)
+        # shape of selections is only defined if all selections have same shape
+        for grid_node, selections_node in matching_shape_pairs(nodes, Grid, Selections)
         # heuristic: if target has different shape
-        and shape(grid_node()) != shape(graph.target)
+        if shape(grid_node()) != shape(graph.target)
     }
 
 
 def extract_islands_functions(nodes, graph):
     return {
-        Function(vectorize(extract_islands), node, Constant(repeat(color)))
+        graph.function(vectorize(extract_islands), node, Constant(repeat(color)))
         for node in nodes.of_type(Grid)
         # heuristic: if target has different shape
         if shape(node()) != shape(graph.target)
@@ -337,7 +478,7 @@ def extract_islands_functions(nodes, graph):
 
 def extract_color_patches_functions(nodes, graph):
     return {
-        Function(vectorize(extract_color_patches), node, Constant(repeat(color)))
+        graph.function(vectorize(extract_color_patches), node, Constant(repeat(color)))
         for node in nodes.of_type(Grid)
         # heuristic: if target has different shape
         if shape(node()) != shape(graph.target)
@@ -347,7 +488,7 @@ def extract_color_patches_functions(nodes, graph):
 
 def extract_color_patch_functions(nodes, graph):
     return {
-        Function(vectorize(extract_color_patch), node, Constant(repeat(color)))
+        graph.function(vectorize(extract_color_patch), node, Constant(repeat(color)))
         for node in nodes.of_type(Grid)
         # heuristic: if target has different shape
         if shape(node()) != shape(graph.target)
@@ -357,29 +498,22 @@ def extract_color_patch_functions(nodes, graph):
 
 def concatenate_functions(nodes, graph):
     functions = set()
+    grid_nodes = nodes.of_type(Grid)
 
     # heuristic: only do concatenations for half target height
-    half_height = (
-        grid_node
-        for grid_node in nodes.of_type(Grid)
-        if multiply(height(grid_node()), 2) == height(graph.target)
-    )
-    for top_node, bottom_node in combinations_with_replacement(half_height, 2):
-        if width(top_node()) == width(bottom_node()):
+    half_height = grid_nodes & nodes.with_height(divide(height(graph.target), 2))
+    for group in grouped_by(half_height, nodes.with_width):
+        for top_node, bottom_node in combinations_with_replacement(group, 2):
             functions.add(
-                Function(vectorize(concatenate_top_bottom), top_node, bottom_node)
+                graph.function(vectorize(concatenate_top_bottom), top_node, bottom_node)
             )
 
     # heuristic: only do concatenations for half target width
-    half_width = (
-        grid_node
-        for grid_node in nodes.of_type(Grid)
-        if multiply(width(grid_node()), 2) == width(graph.target)
-    )
-    for left_node, right_node in combinations_with_replacement(half_width, 2):
-        if height(left_node()) == height(right_node()):
+    half_width = grid_nodes & nodes.with_width(divide(width(graph.target), 2))
+    for group in grouped_by(half_width, nodes.with_height):
+        for left_node, right_node in combinations_with_replacement(group, 2):
             functions.add(
-                Function(vectorize(concatenate_left_right), left_node, right_node)
+                graph.function(vectorize(concatenate_left_right), left_node, right_node)
             )
 
     return functions
@@ -392,12 +526,16 @@ def concatenate_sequence_functions(nodes, graph):
         if is_matching_width(append(sequence_node(), graph.target)) and height_sum(
             sequence_node()
         ) == height(graph.target):
-            functions.add(Function(vectorize(concatenate_top_to_bottom), sequence_node))
+            functions.add(
+                graph.function(vectorize(concatenate_top_to_bottom), sequence_node)
+            )
 
         if is_matching_height(append(sequence_node(), graph.target)) and width_sum(
             sequence_node()
         ) == width(graph.target):
-            functions.add(Function(vectorize(concatenate_left_to_right), sequence_node))
+            functions.add(
+                graph.function(vectorize(concatenate_left_to_right), sequence_node)
+            )
     return functions
 
 
@@ -406,13 +544,13 @@ def split_functions(nodes, graph):
     # heuristic: only do concatenations for shape target.shape * num_splits
     for grid_node in nodes.of_type(Grid):
         if height(grid_node()) == multiply(height(graph.target), 2):
-            functions.add(Function(vectorize(split_top_bottom), grid_node))
+            functions.add(graph.function(vectorize(split_top_bottom), grid_node))
         if height(grid_node()) == multiply(height(graph.target), 3):
-            functions.add(Function(vectorize(split_top_middle_bottom), grid_node))
+            functions.add(graph.function(vectorize(split_top_middle_bottom), grid_node))
         if width(grid_node()) == multiply(width(graph.target), 2):
-            functions.add(Function(vectorize(split_left_right), grid_node))
+            functions.add(graph.function(vectorize(split_left_right), grid_node))
         if width(grid_node()) == multiply(width(graph.target), 3):
-            functions.add(Function(vectorize(split_left_middle_right), grid_node))
+            functions.add(graph.function(vectorize(split_left_middle_right), grid_node))
     return functions
 
 
@@ -420,81 +558,78 @@ def logic_functions(nodes, graph):
     functions = set()
     for sequence in nodes.of_type(Grids):
         if is_matching_shape_pair(sequence()):
-            a = Function(vectorize(take_first), sequence)
-            b = Function(vectorize(take_last), sequence)
-            functions.add(Function(vectorize(elementwise_equal_and), a, b))
-            functions.add(Function(vectorize(elementwise_equal_or), a, b))
-            functions.add(Function(vectorize(elementwise_xor), a, b))
-
-    scalars = nodes.of_type(Grid)
-    for a, b in combinations(scalars, 2):
-        if shape(a()) == shape(b()):
-            functions.add(Function(vectorize(elementwise_equal_or), a, b))
-            # makes stuff too slow:
-            # functions.add(Function(vectorize(elementwise_equal_and), a, b))
-            # functions.add(Function(vectorize(elementwise_xor), a, b))
+            a = graph.function(vectorize(take_first), sequence)
+            b = graph.function(vectorize(take_last), sequence)
+            if a is INVALID or b is INVALID:
+                continue
+            functions.add(graph.function(vectorize(elementwise_equal_and), a, b))
+            functions.add(graph.function(vectorize(elementwise_equal_or), a, b))
+            functions.add(graph.function(vectorize(elementwise_xor), a, b))
+
+    for scalars in grouped_by(nodes.of_type(Grid), nodes.with_shape):
+        for a, b in combinations(scalars, 2):
+            functions.add(graph.function(vectorize(elementwise_equal_or), a, b))
+            functions.add(graph.function(vectorize(elementwise_equal_and), a, b))
+            functions.add(graph.function(vectorize(elementwise_xor), a, b))
 
     return functions
 
 
 def symmetry_functions(nodes, graph):
     functions = set()
+    seen = set()
     for node in nodes.of_type(Grid):
-        functions.add(Function(vectorize(flip_up_down), node))
-        functions.add(Function(vectorize(flip_left_right), node))
-        functions.add(Function(vectorize(rotate_90), node))
-        functions.add(Function(vectorize(rotate_180), node))
-        functions.add(Function(vectorize(rotate_270), node))
-
-    for grid_node, selection_node in product(
-        nodes.of_type(Grid), nodes.of_type(Selection)
-    ):
-        if shape(grid_node()) != shape(selection_node()):
-            continue
-        functions.add(
-            Function(vectorize(flip_up_down_within_bounds), grid_node, selection_node)
-        )
-        functions.add(
-            Function(
-                vectorize(flip_left_right_within_bounds), grid_node, selection_node
-            )
-        )
-        functions.add(
-            Function(vectorize(rotate_90_within_bounds), grid_node, selection_node)
-        )
-        functions.add(
-            Function(vectorize(rotate_180_within_bounds), grid_node, selection_node)
-        )
-        functions.add(
-            Function(vectorize(rotate_270_within_bounds), grid_node, selection_node)
-        )
+        base_key, base_value, base_symmetry = symmetry_chain(node)
+        for operation, symmetry in _symmetry_operations.items():
+            # skip transformations back to first node of chain or to other candidate
+            symmetry = compose_symmetries(base_symmetry, symmetry)
+            if (base_key, symmetry) in seen or _is_invariant(base_value, symmetry):
+                continue
+
+            seen.add((base_key, symmetry))
+            functions.add(graph.function(operation, node))
 
     return functions
 
 
-def take_functions(nodes, graph):
-    functions = set()
-    for sequence in nodes.of_type(Grids) | nodes.of_type(Selections):
-        functions.add(Function(vectorize(take_first), sequence))
-        functions.add(Function(vectorize(take_last), sequence))
+_symmetry_operations = {
+    vectorize(flip_up_down): "flip_up_down",
+    vectorize(flip_left_right): "flip_left_right",
+    vectorize(rotate_90): "rotate_90",
+    vectorize(rotate_180): "rotate_180",
+    vectorize(rotate_270): "rotate_270",
+}
 
-    for sequence in nodes.of_type(Grids):
-        functions.add(Function(vectorize(take_grid_with_unique_colors), sequence))
 
-    return functions
+def symmetry_chain(node):
+    """chain of symmetry transformations ending in grid node
 
+    returns key and value of first node of chain and composed symmetry of chain
+    """
+    if isinstance(node, _SnapshotNode):
+        return node.symmetry_chain
 
-def sort_by_area_functions(nodes, graph):
-    return {
-        Function(vectorize(sort_by_area), sequence)
-        for sequence in nodes.of_type(Grids) | nodes.of_type(Selections)
-    }
+    symmetry = "identity"
+    while getattr(node, "operation", None) in _symmetry_operations:
+        symmetry = compose_symmetries(_symmetry_operations[node.operation], symmetry)
+        node = node.args[0]
+
+    return id(node), node(), symmetry
+
+
+def _is_invariant(grid_vector, symmetry):
+    """check if all grids are unchanged by symmetry, using their cached orbits"""
+    return all(orbit(grid)[symmetry] == grid for grid in grid_vector)
 
 
 def used_colors(grid_vector):
     """intersection of used colors in value tuple elements"""
-    used_colors = (set(grid.used_colors()) for grid in grid_vector)
-    return set.intersection(*used_colors)
+    return frozenset.intersection(*palettes(grid_vector))
+
+
+def all_used_colors(grid_vector):
+    """union of used colors in value tuple elements"""
+    return frozenset.union(*palettes(grid_vector))
 
 
 @reduce_all
@@ -562,6 +697,95 @@ def multiply(vector, factor):
     return tuple(scalar * factor for scalar in vector)
 
 
+def divide(vector, divisor):
+    """exact division of all elements, None if not divisible"""
+    if any(scalar % divisor != 0 for scalar in vector):
+        return None
+
+    return tuple(scalar // divisor for scalar in vector)
+
+
 @vectorize
 def append(sequence, scalar):
     return sequence.append(scalar)
+
+
+generators = [
+    signature_functions,
+    map_color_functions,
+    map_color_in_selection_functions,
+    switch_color_functions,
+    set_selected_to_color_functions,
+    select_color_functions,
+    select_all_colors_functions,
+    merge_selections_functions,
+    extract_selected_area_functions,
+    extract_selected_areas_functions,
+    extract_islands_functions,
+    extract_color_patches_functions,
+    extract_color_patch_functions,
+    concatenate_functions,
+    concatenate_sequence_functions,
+    split_functions,
+    logic_functions,
+    symmetry_functions,
+]
+
+
+class _SnapshotNode(Constant):
+    """stand-in for node of expanded batch in worker process"""
+
+    def __init__(self, index, value, operation, depth, chains):
+        super().__init__(value)
+        self.index = index
+        self.operation = operation
+        self._depth = depth
+        self.color_chain, self.symmetry_chain = chains
+
+    @property
+    def depth(self):
+        return self._depth
+
+
+class _WorkerGraph:
+    """read-only view of graph for generators in worker process"""
+
+    def __init__(self, target, max_depth):
+        self.target = target
+        self.prune = _static_pruning(target, max_depth)
+        self.function = FunctionMemo(is_valid, prune=self.prune)
+
+
+_worker_graph = None
+
+
+def _initialize_worker(target, max_depth):
+    global _worker_graph
+    _worker_graph = _WorkerGraph(target, max_depth)
+
+
+def _generate_in_worker(generator, snapshot):
+    batch = [
+        _SnapshotNode(index, *node_snapshot)
+        for index, node_snapshot in enumerate(pickle.loads(snapshot))
+    ]
+    # fresh memo per batch, as snapshot nodes are only valid for this batch
+    _worker_graph.function = FunctionMemo(is_valid, prune=_worker_graph.prune)
+
+    functions = generator(NodeCollection(batch), _worker_graph)
+    functions.discard(INVALID)
+    return [_to_record(function) for function in functions]
+
+
+def _to_record(function):
+    """compact representation of function by operation, args and value"""
+    arg_specs = []
+    for arg in function.args:
+        if isinstance(arg, _SnapshotNode):
+            arg_specs.append(("node", arg.index))
+        elif isinstance(arg, Function):
+            arg_specs.append(("function", _to_record(arg)))
+        else:
+            arg_specs.append(("constant", arg.value))
+
+    return function.operation, tuple(arg_specs), function()
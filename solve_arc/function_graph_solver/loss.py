@@ -5,10 +5,19 @@ from .vectorize import *
 
 
 def loss(node, target):
+    return static_loss(node, target) * usages_loss(node)
+
+
+def static_loss(node, target):
+    """part of loss which does not change after creation of node"""
     depth_loss = 0.1 * (node.depth + 1)
     distance_loss = mean(distance(node(), target))
+    return depth_loss * distance_loss
+
+
+def usages_loss(node):
     expanded_count_loss = 0.2 * (node.usages + 1)
-    return depth_loss * distance_loss * expanded_count_loss
+    return expanded_count_loss
 
 
 @vectorize
@@ -1,41 +1,70 @@
-from collections import defaultdict
+from collections import Counter, defaultdict
 
 
 from ..language import *
 from .vectorize import *
 from .nodes import *
+from .weighted_sampler import WeightedSampler
+
+# rejected draws from smallest index before falling back to materialized intersection
+MAX_REJECTIONS = 10
 
 
 class NodeCollection(set):
     def __init__(self, nodes):
         super().__init__(nodes)
-        self._by_type = defaultdict(set)
-        self._by_length = defaultdict(set)
+        self._by_type = defaultdict(_WeightedSet)
+        self._by_length = defaultdict(_WeightedSet)
         self.with_shape = _ByProperty(shape)
         self.with_height = _ByProperty(height)
         self.with_width = _ByProperty(width)
+        self._by_shape_and_type = defaultdict(set)
+        # derived pools, only created on request and then maintained on add
+        self._pools = {}
+        self._matching_shapes = {}
+        # id of node -> indexes containing node, to update its weight in all of them
+        self._indexes = {}
         for node in nodes:
             self._process(node)
 
     def add(self, node):
+        if node in self:
+            return
+
         super().add(node)
         self._process(node)
 
     def _process(self, node):
+        self._indexes.setdefault(id(node), [])
         # sort by type
         type_ = common_type(node())
         if type_ is not None:
-            self._by_type[type_].add(node)
+            self._insert(self._by_type[type_], node)
 
-            self.with_shape.process(node, type_)
-            self.with_height.process(node, type_)
-            self.with_width.process(node, type_)
+            shape_ = self.with_shape.process(node, type_, self._insert)
+            self.with_height.process(node, type_, self._insert)
+            self.with_width.process(node, type_, self._insert)
 
             if type_ in {Grids, Selections}:
                 # sort by sequence length
                 lengths = {len(element) for element in node()}
                 if len(lengths) == 1:
-                    self._by_length[lengths.pop()].add(node)
+                    self._insert(self._by_length[lengths.pop()], node)
+
+            if shape_ is not None:
+                self._by_shape_and_type[shape_, type_].add(node)
+                for matching_shapes in self._matching_shapes.values():
+                    matching_shapes.process(node, shape_, type_, self._insert)
+
+        for condition, pool in self._pools.values():
+            if condition(node):
+                self._insert(pool, node)
+
+    def _insert(self, index, node):
+        # keep first of nodes with equal value, like sets
+        if node not in index:
+            index.insert(node)
+            self._indexes[id(node)].append(index)
 
     def with_type(self, type_):
         return self._by_type[type_]
@@ -43,6 +72,108 @@ class NodeCollection(set):
     def with_length(self, length):
         return self._by_length[length]
 
+    def pool(self, key, condition):
+        """nodes for which condition holds, condition is evaluated once per node
+
+        pool is created on first request and maintained as nodes are added,
+        key identifies the condition
+        """
+        if key not in self._pools:
+            pool = _WeightedSet()
+            for node in self:
+                if condition(node):
+                    self._insert(pool, node)
+            self._pools[key] = (condition, pool)
+
+        return self._pools[key][1]
+
+    def with_matching_shapes(self, *types, replace=True):
+        """nodes of first type with a shape, for which there are nodes of all types
+
+        (distinct nodes for repeated types if not replace), maintained like pools
+        """
+        key = (types, replace)
+        if key not in self._matching_shapes:
+            matching_shapes = _MatchingShapes(types, replace, self._by_shape_and_type)
+            for shape_ in {shape_ for shape_, _ in self._by_shape_and_type}:
+                matching_shapes.update(shape_, self._insert)
+            self._matching_shapes[key] = matching_shapes
+
+        return self._matching_shapes[key].nodes
+
+    def update_weights(self, nodes):
+        """update sampling weights of nodes, i.e. after their usages changed"""
+        for node in nodes:
+            # by identity, as other nodes may have equal value
+            indexes = self._indexes.get(id(node), ())
+            if len(indexes) > 0:
+                weight = sampling_weight(node)
+                for index in indexes:
+                    index.reweight(node, weight)
+
+    def sample(self, random, *indexes, exclude=()):
+        """draw node in all indexes (or sets) and not in exclude proportional to weight
+
+        draws from the smallest index and rejects nodes not in the others, only
+        materializes the intersection if too many draws are rejected,
+        None if there is no such node
+        """
+        smallest = min(indexes, key=len)
+        others = [index for index in indexes if index is not smallest]
+
+        def is_candidate(node):
+            return node not in exclude and all(node in index for index in others)
+
+        if isinstance(smallest, _WeightedSet) and len(smallest) > 0:
+            for _ in range(MAX_REJECTIONS):
+                node = smallest.sample(random)
+                if is_candidate(node):
+                    return node
+
+        candidates = [node for node in smallest if is_candidate(node)]
+        if len(candidates) == 0:
+            return None
+
+        weights = [sampling_weight(node) for node in candidates]
+        return random.choices(candidates, weights=weights)[0]
+
+
+def sampling_weight(node):
+    """prefer nodes, which are shallow and have rarely been used as args"""
+    return 1 / ((0.1 * node.usages) + (0.1 * node.depth) + 1)
+
+
+class _WeightedSet(set):
+    """index of nodes, which can be sampled proportional to their sampling weight
+
+    the weighted sampler is only built on the first draw, so indexes which are never
+    sampled (i.e. in full search) do not need to keep weights up to date
+    """
+
+    def __init__(self):
+        super().__init__()
+        # sampler of ids, as hashing nodes requires hashing their values
+        self._sampler = None
+        self._nodes_by_id = {}
+
+    def insert(self, node):
+        self.add(node)
+        self._nodes_by_id[id(node)] = node
+        if self._sampler is not None:
+            self._sampler.add(id(node), sampling_weight(node))
+
+    def reweight(self, node, weight):
+        if self._sampler is not None:
+            self._sampler.update(id(node), weight)
+
+    def sample(self, random):
+        if self._sampler is None:
+            self._sampler = WeightedSampler(
+                (id(node), sampling_weight(node)) for node in self._nodes_by_id.values()
+            )
+
+        return self._nodes_by_id[self._sampler.sample(random)]
+
 
 class _ByProperty:
     applicable_types = {Grid, Selection, Grids, Selections}
@@ -50,20 +181,25 @@ class _ByProperty:
 
     def __init__(self, get_property):
         self._get_property = get_property
-        self._by_property = defaultdict(set)
-        self.matching_sequences = set()
+        self._by_property = defaultdict(_WeightedSet)
+        self.matching_sequences = _WeightedSet()
+
+    def process(self, node, type_, insert):
+        """index node, return its property (None if not applicable)"""
+        if type_ not in self.applicable_types:
+            return None
 
-    def process(self, node, type_):
-        if type_ in self.applicable_types:
-            property_vector = self._get_property(node())
-            self._by_property[property_vector].add(node)
+        property_vector = self._get_property(node())
+        insert(self._by_property[property_vector], node)
 
-            # when sequence does not match, property will be None
-            # check for all sequences in property vector
-            if type_ in self.sequence_types and all(
-                [element is not None for element in property_vector]
-            ):
-                self.matching_sequences.add(node)
+        # when sequence does not match, property will be None
+        # check for all sequences in property vector
+        if type_ in self.sequence_types and all(
+            [element is not None for element in property_vector]
+        ):
+            insert(self.matching_sequences, node)
+
+        return property_vector
 
     def __call__(self, value):
         return self._by_property[value]
@@ -73,10 +209,39 @@ class _ByProperty:
         return self._by_property.keys()
 
 
+class _MatchingShapes:
+    """nodes of first type with a shape, for which there are enough nodes of all types"""
+
+    def __init__(self, types, replace, by_shape_and_type):
+        self.first_type = types[0]
+        self.required = {type_: 1 for type_ in types} if replace else Counter(types)
+        self.by_shape_and_type = by_shape_and_type
+        self.shapes = set()
+        self.nodes = _WeightedSet()
+
+    def process(self, node, shape_, type_, insert):
+        if type_ not in self.required:
+            return
+
+        if shape_ not in self.shapes:
+            self.update(shape_, insert)
+        elif type_ == self.first_type:
+            insert(self.nodes, node)
+
+    def update(self, shape_, insert):
+        """add nodes of shape, once there are enough nodes of all types"""
+        if all(
+            len(self.by_shape_and_type.get((shape_, type_), ())) >= num_required
+            for type_, num_required in self.required.items()
+        ):
+            self.shapes.add(shape_)
+            for node in self.by_shape_and_type[shape_, self.first_type]:
+                insert(self.nodes, node)
+
+
 def used_colors(grid_vector):
     """intersection of used colors in value tuple elements"""
-    used_colors = (set(grid.used_colors()) for grid in grid_vector)
-    return set.intersection(*used_colors)
+    return frozenset.intersection(*palettes(grid_vector))
 
 
 def common_type(argument_vector):
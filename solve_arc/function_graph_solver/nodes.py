@@ -87,3 +87,106 @@ class Constant(_Node):
 
     def __hash__(self):
         return hash(self.value)
+
+
+class _Invalid:
+    """marker for functions which evaluate to an invalid value"""
+
+    def __repr__(self):
+        return "INVALID"
+
+
+INVALID = _Invalid()
+
+
+class FunctionMemo:
+    """memo table of functions keyed on operation and argument nodes
+
+    functions are only created and evaluated on the first request for a key,
+    later requests return the existing node (or INVALID) without evaluation,
+    except for functions at or beyond max_depth which are not memoized
+
+    functions for which any of the prune checks (operation, args) is true are
+    INVALID without evaluation
+    """
+
+    def __init__(
+        self,
+        is_valid=lambda value: True,
+        max_depth=None,
+        track_usages=False,
+        prune=(),
+    ):
+        self.is_valid = is_valid
+        self.max_depth = max_depth
+        self.prune = prune
+        self.hits = 0
+        self.misses = 0
+        self.pruned = 0
+        self._functions = {}
+        # args whose usages changed since last call of pop_used_args (if tracked)
+        self._used_args = set() if track_usages else None
+
+    def __call__(self, operation, *args):
+        return self._get(operation, args)
+
+    def with_value(self, value, operation, *args):
+        """like calling memo, but use value evaluated elsewhere (i.e. other process)"""
+        return self._get(operation, args, evaluated=(value,))
+
+    def _get(self, operation, args, evaluated=None):
+        if self._used_args is not None:
+            self._used_args.update(args)
+
+        key = (operation, tuple(_argument_key(arg) for arg in args))
+        if key in self._functions:
+            self.hits += 1
+            # count usage like on creation, as usages drive search heuristics
+            for arg in args:
+                arg.usages += 1
+            function, _ = self._functions[key]
+            return function
+
+        self.misses += 1
+        if any(check(operation, args) for check in self.prune):
+            self.pruned += 1
+            for arg in args:
+                arg.usages += 1
+            self._functions[key] = (INVALID, args)
+            return INVALID
+
+        function = Function(operation, *args)
+        if evaluated is not None:
+            (function.value,) = evaluated
+
+        if not self.is_valid(function()):
+            function = INVALID
+
+        if (
+            function is not INVALID
+            and self.max_depth is not None
+            and function.depth >= self.max_depth
+        ):
+            # nodes beyond max depth are discarded by the graph,
+            # do not memoize to avoid holding on to their values
+            return function
+
+        # keep args alive, so their ids stay unique
+        self._functions[key] = (function, args)
+        return function
+
+    def pop_used_args(self):
+        """return args used since last call, only available with track_usages"""
+        used_args, self._used_args = self._used_args, set()
+        return used_args
+
+    def __len__(self):
+        return len(self._functions)
+
+
+def _argument_key(node):
+    """identity of function nodes, exact value of constant nodes"""
+    if isinstance(node, Function):
+        return id(node)
+
+    return node.value
@@ -0,0 +1,103 @@
+"""
+portfolio of independent sampling searches with different seeds,
+racing in separate processes for the first solution
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import logging
+import multiprocessing
+
+from . import sampling_search
+from .nodes import Function
+
+logger = logging.getLogger(__name__)
+
+
+class Graph:
+    def __init__(self, initial_nodes, target, portfolio_size=None, **kwargs):
+        self.initial_nodes = initial_nodes
+        self.target = target
+        self.portfolio_size = portfolio_size or multiprocessing.cpu_count()
+        self.kwargs = kwargs
+
+        # summaries of all member graphs, available after solve
+        self.summaries = []
+
+    def solve(self):
+        stop_event = multiprocessing.Event()
+        solution = None
+
+        with ProcessPoolExecutor(
+            max_workers=self.portfolio_size,
+            initializer=_initialize_worker,
+            initargs=(stop_event,),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _solve_in_worker, self.initial_nodes, self.target, seed, self.kwargs
+                )
+                for seed in range(self.portfolio_size)
+            ]
+
+            try:
+                # wait for all members, which stop early as soon as one found a solution
+                for future in as_completed(futures):
+                    member_solution, summary = future.result()
+                    self.summaries.append(summary)
+
+                    if member_solution is not None and solution is None:
+                        logger.debug("solution found with seed %d", summary.seed)
+                        solution = member_solution
+                        stop_event.set()
+            finally:
+                # also stop members when interrupted, i.e. by timeout
+                stop_event.set()
+
+        if solution is None:
+            return None
+
+        return _relink(solution, self.initial_nodes)
+
+
+class Summary:
+    """statistics of member graph, which can not be transferred as a whole"""
+
+    def __init__(self, seed, graph, solution):
+        # avoid circular import, solver depends on this module
+        from .solver import branching_factor
+
+        self.seed = seed
+        self.branching_factor = branching_factor(graph)
+        self.nodes_count = len(graph.nodes)
+        self.memo_hits = graph.function.hits
+        self.memo_misses = graph.function.misses
+        self.solved = solution is not None
+
+
+_stop_event = None
+
+
+def _initialize_worker(stop_event):
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _solve_in_worker(initial_nodes, target, seed, kwargs):
+    graph = sampling_search.Graph(
+        initial_nodes, target, seed=seed, stop_event=_stop_event, **kwargs
+    )
+    solution = graph.solve()
+    return solution, Summary(seed, graph, solution)
+
+
+def _relink(node, initial_nodes):
+    """replace copies of initial nodes from other process with the original nodes"""
+    if isinstance(node, Function):
+        node.args = tuple(_relink(arg, initial_nodes) for arg in node.args)
+        return node
+
+    for initial_node in initial_nodes:
+        if type(initial_node) == type(node) and initial_node.value == node.value:
+            return initial_node
+
+    return node
@@ -1,6 +1,5 @@
 import random
 import logging
-from collections import Counter
 from itertools import count
 
 import numpy as np
@@ -9,46 +8,102 @@ from ..language import *
 from .vectorize import *
 from .nodes import *
 from .node_collection import *
-
+from .shape_inference import ShapePruning
+from .color_inference import ColorPruning
+from .weighted_sampler import AliasTable
 
 logger = logging.getLogger(__name__)
 
 
 class Graph:
-    def __init__(self, initial_nodes, target, max_depth=5, max_steps=10000, **kwargs):
+    def __init__(
+        self,
+        initial_nodes,
+        target,
+        max_depth=5,
+        max_steps=10000,
+        seed=0,
+        stop_event=None,
+        verify=None,
+        **kwargs
+    ):
         self.target = target
+        # optional check of nodes matching target, i.e. on constraints not in target
+        self.verify = verify
         self.max_depth = max_depth if max_depth is not None else float("inf")
         self.steps = range(max_steps) if max_steps else count()
 
+        # separate random state per graph, so graphs with different seeds are independent
+        self.random = random.Random(seed)
+        self.np_random = np.random.RandomState(seed)
+
+        # optional event to stop search from other process (i.e. in portfolio search)
+        self.stop_event = stop_event
+
         self.nodes = NodeCollection(initial_nodes)
+        # create functions through memo to avoid reevaluating resampled functions
+        # and to reject functions not leading to target without evaluation
+        self.function = FunctionMemo(
+            is_valid,
+            max_depth=self.max_depth,
+            track_usages=True,
+            prune=(
+                ShapePruning(target, self.max_depth),
+                ColorPruning(target, self.max_depth),
+            ),
+        )
         self.function_sampler = FunctionSampler(self)
         self.expansion_count = 0
 
     def solve(self):
         for step in self.steps:
+            if self._is_stopped(step):
+                logger.debug("search stopped")
+                return None
+
             try:
                 node = self.function_sampler()
 
+                if node is INVALID:
+                    continue
+
                 if node.depth < self.max_depth:
                     self.nodes.add(node)
 
-                if node() == self.target:
+                if node() == self.target and (self.verify is None or self.verify(node)):
                     return node
 
             except NoSample:
                 pass
 
-        logger.debug("max steps reached")
+        logger.debug(
+            "max steps reached (memo hits: %d, misses: %d, pruned: %d)",
+            self.function.hits,
+            self.function.misses,
+            self.function.pruned,
+        )
         return None
 
+    def _is_stopped(self, step):
+        # only check event every few steps, as it needs to synchronize
+        return (
+            self.stop_event is not None and step % 100 == 0 and self.stop_event.is_set()
+        )
+
 
 DISABLED = 0
 
+# number of operations drawn at once
+OPERATION_BATCH_SIZE = 256
+
 
 class FunctionSampler:
     def __init__(self, graph):
         self.nodes = graph.nodes
         self.target = graph.target
+        self.function = graph.function
+        self.random = graph.random
+        self.np_random = graph.np_random
 
         self.color_weights = {
             Color.BLACK: 1.0,
@@ -63,163 +118,105 @@ class FunctionSampler:
             Color.CRIMSON: 1.0,
         }
 
-        self.operation_weights = {
-            # color
-            switch_color: 1.0,
-            map_color: 1.0,
-            map_color_in_selection: 1.0,
-            set_selected_to_color: 1.0,
-            fill_grid: DISABLED,
-            # compositions
-            extract_color_patches: 1.0,
-            extract_color_patch: 1.0,
-            extract_islands: 1.0,
-            # logic
-            elementwise_equal_and: 1.0,
-            elementwise_equal_or: 1.0,
-            elementwise_xor: 1.0,
-            selection_elementwise_and: DISABLED,
-            selection_elementwise_or: DISABLED,
-            selection_elementwise_xor: DISABLED,
-            selection_elementwise_eq: DISABLED,
-            selection_elementwise_not: DISABLED,
-            # segmentation
-            extract_selected_areas: 1.0,
-            extract_selected_area: 1.0,
-            split_left_right: 1.0,
-            split_left_middle_right: 1.0,
-            split_top_bottom: 1.0,
-            split_top_middle_bottom: 1.0,
-            concatenate_top_bottom: 1.0,
-            concatenate_left_right: 1.0,
-            concatenate_top_to_bottom: 1.0,
-            concatenate_left_to_right: 1.0,
-            merge_grids_with_mask: 1.0,
-            take_first: 1.0,
-            take_last: 1.0,
-            sort_by_area: 1.0,
-            take_grid_with_unique_colors: 1.0,
-            # selection
-            select_color: 1.0,
-            select_all_colors: 1.0,
-            split_selection_into_connected_areas: 1.0,
-            split_selection_into_connected_areas_no_diagonals: 1.0,
-            split_selection_into_connected_areas_skip_gaps: 1.0,
-            extend_selections_to_bounds: 1.0,
-            extend_selection_to_bounds: 1.0,
-            filter_selections_touching_edge: 1.0,
-            filter_selections_not_touching_edge: 1.0,
-            merge_selections: 1.0,
-            # symmetry
-            flip_up_down: 1.0,
-            flip_left_right: 1.0,
-            rotate_90: 1.0,
-            rotate_180: 1.0,
-            rotate_270: 1.0,
-            flip_up_down_within_bounds: 1.0,
-            flip_left_right_within_bounds: 1.0,
-            rotate_90_within_bounds: 1.0,
-            rotate_180_within_bounds: 1.0,
-            rotate_270_within_bounds: 1.0,
+        # map for operation -> function to generate args for operation,
+        # derived from signature unless operation needs colors or heuristics
+        self.sample_args = {
+            function: self.signature_sampler(operation)
+            for function, operation in operations.items()
         }
+        self.sample_args.update(
+            {
+                # color
+                switch_color: self.sample_swap_color_args,
+                map_color: self.sample_map_color_args,
+                map_color_in_selection: self.sample_map_color_in_selection_args,
+                set_selected_to_color: self.sample_set_selected_to_color_args,
+                # compositions
+                extract_color_patches: self.sample_extract_args,
+                extract_color_patch: self.sample_extract_args,
+                extract_islands: self.sample_extract_args,
+                # logic
+                elementwise_equal_and: self.sample_logic_args,
+                elementwise_equal_or: self.sample_logic_args,
+                elementwise_xor: self.sample_logic_args,
+                selection_elementwise_and: self.sample_selection_logic_args,
+                selection_elementwise_or: self.sample_selection_logic_args,
+                selection_elementwise_xor: self.sample_selection_logic_args,
+                selection_elementwise_eq: self.sample_selection_logic_args,
+                # segmentation
+                split_left_right: lambda: self.sample_split_args(width_segments=2),
+                split_left_middle_right: lambda: self.sample_split_args(
+                    width_segments=3
+                ),
+                split_top_bottom: lambda: self.sample_split_args(height_segments=2),
+                split_top_middle_bottom: lambda: self.sample_split_args(
+                    height_segments=3
+                ),
+                concatenate_top_bottom: self.sample_concatenate_top_bottom_args,
+                concatenate_left_right: self.sample_concatenate_left_right_args,
+                concatenate_top_to_bottom: self.sample_concatenate_top_to_bottom_args,
+                concatenate_left_to_right: self.sample_concatenate_left_to_right_args,
+                # selection
+                select_color: self.sample_select_color_args,
+                select_all_colors: self.sample_select_color_args,
+                merge_selections: self.sample_merge_selection_args,
+            }
+        )
 
-        # map for operation -> function to generate args for operation
-        self.sample_args = {
-            # color
-            switch_color: self.sample_swap_color_args,
-            map_color: self.sample_map_color_args,
-            map_color_in_selection: self.sample_map_color_in_selection_args,
-            set_selected_to_color: self.sample_set_selected_to_color_args,
-            fill_grid: None,
-            # compositions
-            extract_color_patches: self.sample_extract_args,
-            extract_color_patch: self.sample_extract_args,
-            extract_islands: self.sample_extract_args,
-            # logic
-            elementwise_equal_and: self.sample_logic_args,
-            elementwise_equal_or: self.sample_logic_args,
-            elementwise_xor: self.sample_logic_args,
-            selection_elementwise_and: None,
-            selection_elementwise_or: None,
-            selection_elementwise_xor: None,
-            selection_elementwise_eq: None,
-            selection_elementwise_not: None,
-            # segmentation
-            # TODO: sample with highter prob for shape != shape(target)
-            extract_selected_areas: lambda: self.sample_matching_shape_args(
-                Grid, Selections
-            ),
-            # TODO: sample with highter prob for shape != shape(target)
-            extract_selected_area: lambda: self.sample_matching_shape_args(
-                Grid, Selection
-            ),
-            split_left_right: lambda: self.sample_split_args(width_segments=2),
-            split_left_middle_right: lambda: self.sample_split_args(width_segments=3),
-            split_top_bottom: lambda: self.sample_split_args(height_segments=2),
-            split_top_middle_bottom: lambda: self.sample_split_args(height_segments=3),
-            concatenate_top_bottom: self.sample_concatenate_top_bottom_args,
-            concatenate_left_right: self.sample_concatenate_left_right_args,
-            concatenate_top_to_bottom: self.sample_concatenate_top_to_bottom_args,
-            concatenate_left_to_right: self.sample_concatenate_left_to_right_args,
-            merge_grids_with_mask: lambda: self.sample_matching_shape_args(
-                Grid, Grid, Selection
-            ),
-            take_first: lambda: self.sample_type_args(Grids, Selections),
-            take_last: lambda: self.sample_type_args(Grids, Selections),
-            sort_by_area: lambda: self.sample_type_args(Grids, Selections),
-            take_grid_with_unique_colors: lambda: self.sample_type_args(Grids),
-            # selection
-            select_color: self.sample_select_color_args,
-            select_all_colors: self.sample_select_color_args,
-            split_selection_into_connected_areas: lambda: self.sample_type_args(
-                Selection
-            ),
-            split_selection_into_connected_areas_no_diagonals: lambda: self.sample_type_args(
-                Selection
-            ),
-            split_selection_into_connected_areas_skip_gaps: lambda: self.sample_type_args(
-                Selection
-            ),
-            extend_selections_to_bounds: lambda: self.sample_type_args(Selections),
-            extend_selection_to_bounds: lambda: self.sample_type_args(Selection),
-            filter_selections_touching_edge: lambda: self.sample_type_args(Selections),
-            filter_selections_not_touching_edge: lambda: self.sample_type_args(
-                Selections
-            ),
-            merge_selections: self.sample_merge_selection_args,
-            # symmetry
-            flip_up_down: lambda: self.sample_type_args(Grid),
-            flip_left_right: lambda: self.sample_type_args(Grid),
-            rotate_90: lambda: self.sample_type_args(Grid),
-            rotate_180: lambda: self.sample_type_args(Grid),
-            rotate_270: lambda: self.sample_type_args(Grid),
-            flip_up_down_within_bounds: lambda: self.sample_matching_shape_args(
-                Grid, Selection
-            ),
-            flip_left_right_within_bounds: lambda: self.sample_matching_shape_args(
-                Grid, Selection
-            ),
-            rotate_90_within_bounds: lambda: self.sample_matching_shape_args(
-                Grid, Selection
-            ),
-            rotate_180_within_bounds: lambda: self.sample_matching_shape_args(
-                Grid, Selection
-            ),
-            rotate_270_within_bounds: lambda: self.sample_matching_shape_args(
-                Grid, Selection
-            ),
+        self.operation_weights = {
+            operation: DISABLED if sample_args is None else 1.0
+            for operation, sample_args in self.sample_args.items()
         }
 
     def __call__(self):
-        operation = self.sample_operation()
-        args = self.sample_args[operation]()
-        # vectorize operation to as nodes contain all values for all constraints
-        return Function(vectorize(operation), *args)
+        try:
+            operation = self.sample_operation()
+            args = self.sample_args[operation]()
+            # vectorize operation to as nodes contain all values for all constraints
+            return self.function(vectorize(operation), *args)
+        finally:
+            # usages of args changed, even if sampling failed after some functions
+            self.nodes.update_weights(self.function.pop_used_args())
+
+    @property
+    def operation_weights(self):
+        return self._operation_weights
+
+    @operation_weights.setter
+    def operation_weights(self, operation_weights):
+        """weights are fixed, assign new weights to change them"""
+        self._operation_weights = operation_weights
+        self._operation_table = AliasTable(operation_weights.items())
+        self._sampled_operations = []
 
     def sample_operation(self):
-        operations = list(self.operation_weights.keys())
-        weights = list(self.operation_weights.values())
-        return _py_random.choices(operations, weights=weights)[0]
+        # only operations are drawn in batches, as args of each function depend on
+        # the nodes added by the previous functions
+        if len(self._sampled_operations) == 0:
+            self._sampled_operations = self._operation_table.choices(
+                self.np_random, k=OPERATION_BATCH_SIZE
+            )
+            self._sampled_operations.reverse()
+
+        return self._sampled_operations.pop()
+
+    def signature_sampler(self, operation):
+        """function to generate args of operation from its signature
+
+        None if operation has scalar arguments or preconditions other than same shape
+        """
+        if len(operation.scalar_args) > 0:
+            return None
+
+        if len(operation.arg_types) == 1 and len(operation.preconditions) == 0:
+            return lambda: self.sample_type_args(*alternatives(operation.arg_types[0]))
+
+        if operation.preconditions == (same_shape,) and all(
+            len(alternatives(arg_type)) == 1 for arg_type in operation.arg_types
+        ):
+            return lambda: self.sample_matching_shape_args(*operation.arg_types)
+
+        return None
 
     def sample_swap_color_args(self):
         node = self.sample_node(self.nodes.with_type(Grid))
@@ -258,7 +255,8 @@ class FunctionSampler:
     def sample_extract_args(self):
         # TODO: sample all, but same shape as target with less prob
         node = self.sample_node(
-            self.nodes.with_type(Grid) - self.nodes.with_shape(shape(self.target))
+            self.nodes.with_type(Grid),
+            exclude=self.nodes.with_shape(shape(self.target)),
         )
         # TODO: sample from_color only from used_colors(node)
         color = self.sample_color(used_colors(node()))
@@ -267,15 +265,28 @@ class FunctionSampler:
     def sample_logic_args(self):
         # TODO: rely on take functions and use scalar grids instead of sequence
         sample_matching_shape_grids = self.sample_node(
-            self.nodes.with_type(Grids)
-            & self.nodes.with_length(2)
-            & self.nodes.with_shape.matching_sequences
+            self.nodes.pool("matching_shape_pairs", self._is_matching_shape_pair)
         )
+        args = (
+            self.function(vectorize(take_first), sample_matching_shape_grids),
+            self.function(vectorize(take_last), sample_matching_shape_grids),
+        )
+        if INVALID in args:
+            raise NoSample()
+
+        return args
+
+    def _is_matching_shape_pair(self, node):
         return (
-            Function(vectorize(take_first), sample_matching_shape_grids),
-            Function(vectorize(take_last), sample_matching_shape_grids),
+            node in self.nodes.with_type(Grids)
+            and node in self.nodes.with_length(2)
+            and node in self.nodes.with_shape.matching_sequences
         )
 
+    def sample_selection_logic_args(self):
+        # combining selection with itself is pointless
+        return self.sample_matching_shape_args(Selection, Selection, replace=False)
+
     def sample_select_color_args(self):
         node = self.sample_node(self.nodes.with_type(Grid))
         color = self.sample_color(used_colors(node()))
@@ -283,36 +294,16 @@ class FunctionSampler:
 
     def sample_merge_selection_args(self):
         node = self.sample_node(
-            self.nodes.with_type(Selections) & self.nodes.with_shape.matching_sequences
+            self.nodes.with_type(Selections), self.nodes.with_shape.matching_sequences
         )
         return (node,)
 
     def sample_split_args(self, height_segments=1, width_segments=1):
         # TODO: sample with higher prob when not target shape
-        candidates = set(self.nodes.with_type(Grid))
-
-        def nodes_with_splittable_dimension(nodes_with_dimension, num_segments):
-            splittable_dimensions = {
-                dimension
-                for dimension in nodes_with_dimension.values
-                if all(
-                    element is not None and element % num_segments == 0
-                    for element in dimension
-                )
-            }
-            if len(splittable_dimensions) == 0:
-                raise NoSample()
-            return union(nodes_with_dimension(dim) for dim in splittable_dimensions)
-
-        if height_segments > 1:
-            candidates &= nodes_with_splittable_dimension(
-                self.nodes.with_height, height_segments
-            )
-        if width_segments > 1:
-            candidates &= nodes_with_splittable_dimension(
-                self.nodes.with_width, width_segments
-            )
-
+        candidates = self.nodes.pool(
+            ("splittable", height_segments, width_segments),
+            lambda node: is_splittable(node(), height_segments, width_segments),
+        )
         return (self.sample_node(candidates),)
 
     def sample_concatenate_top_bottom_args(self):
@@ -321,7 +312,7 @@ class FunctionSampler:
         candidates = self.nodes.with_type(Grid)
         top_node = self.sample_node(candidates)
         bottom_node = self.sample_node(
-            candidates & self.nodes.with_width(width(top_node()))
+            candidates, self.nodes.with_width(width(top_node()))
         )
         return top_node, bottom_node
 
@@ -331,81 +322,63 @@ class FunctionSampler:
         candidates = self.nodes.with_type(Grid)
         left_node = self.sample_node(candidates)
         right_node = self.sample_node(
-            candidates & self.nodes.with_height(height(left_node()))
+            candidates, self.nodes.with_height(height(left_node()))
         )
         return left_node, right_node
 
     def sample_concatenate_top_to_bottom_args(self):
         # TODO: sample with higher prob when not target shape
-        candidates = (
-            self.nodes.with_type(Grids) & self.nodes.with_width.matching_sequences
+        return (
+            self.sample_node(
+                self.nodes.with_type(Grids), self.nodes.with_width.matching_sequences
+            ),
         )
-        return (self.sample_node(candidates),)
 
     def sample_concatenate_left_to_right_args(self):
         # TODO: sample with higher prob when not target shape
-        candidates = (
-            self.nodes.with_type(Grids) & self.nodes.with_height.matching_sequences
+        return (
+            self.sample_node(
+                self.nodes.with_type(Grids), self.nodes.with_height.matching_sequences
+            ),
         )
-        return (self.sample_node(candidates),)
 
     def sample_type_args(self, *types):
         if len(types) > 1:
-            candidates = union(self.nodes.with_type(type_) for type_ in types)
+            candidates = self.nodes.pool(
+                ("types",) + types, lambda node: common_type(node()) in types
+            )
         else:
             candidates = self.nodes.with_type(types[0])
         return (self.sample_node(candidates),)
 
     def sample_matching_selection_node(self, grid_node):
         return self.sample_node(
-            self.nodes.with_type(Selection) & self.nodes.with_shape(shape(grid_node()))
+            self.nodes.with_type(Selection), self.nodes.with_shape(shape(grid_node()))
         )
 
     def sample_matching_shape_args(self, *types, replace=True):
-        if replace:
-            num_required = {type_: 1 for type_ in types}
-        else:
-            num_required = Counter(types)
-
-        candidates_by_type = [set() for _ in types]
-
-        for shape_ in self.nodes.with_shape.values:
-            nodes_for_shape = self.nodes.with_shape(shape_)
-            nodes_by_type = [
-                self.nodes.with_type(type_) & nodes_for_shape for type_ in types
-            ]
-
-            if all(
-                len(nodes) >= num_required[type_]
-                for type_, nodes in zip(types, nodes_by_type)
-            ):
-                for candidates, nodes in zip(candidates_by_type, nodes_by_type):
-                    candidates |= nodes
-
-        if any(len(candidates) == 0 for candidates in candidates_by_type):
-            raise NoSample()
-
-        sampled_nodes = []
-        sampled_nodes.append(self.sample_node(candidates_by_type[0]))
+        sampled_nodes = [
+            self.sample_node(self.nodes.with_matching_shapes(*types, replace=replace))
+        ]
         nodes_with_matching_shape = self.nodes.with_shape(shape(sampled_nodes[0]()))
-        for candidates in candidates_by_type[1:]:
-            candidates &= nodes_with_matching_shape
-            if not replace:
-                candidates -= set(sampled_nodes)
-            sampled_nodes.append(self.sample_node(candidates))
+        for type_ in types[1:]:
+            sampled_nodes.append(
+                self.sample_node(
+                    self.nodes.with_type(type_),
+                    nodes_with_matching_shape,
+                    exclude=() if replace else set(sampled_nodes),
+                )
+            )
 
         return tuple(sampled_nodes)
 
-    def sample_node(self, nodes):
-        nodes = list(nodes)
-        if len(nodes) == 0:
+    def sample_node(self, *nodes, exclude=()):
+        """sample node in intersection of node sets (i.e. indexes of node collection)"""
+        node = self.nodes.sample(self.random, *nodes, exclude=exclude)
+        if node is None:
             raise NoSample()
 
-        def weight(node):
-            return 1 / ((0.1 * node.usages) + (0.1 * node.depth) + 1)
-
-        weights = [weight(node) for node in nodes]
-        return _py_random.choices(nodes, weights=weights)[0]
+        return node
 
     def sample_color(self, colors):
         colors = list(colors)
@@ -413,20 +386,15 @@ class FunctionSampler:
             raise NoSample()
 
         weights = [self.color_weights[color] for color in colors]
-        return _py_random.choices(colors, weights=weights)[0]
-
+        return self.random.choices(colors, weights=weights)[0]
 
-def union(iterable):
-    elements = list(iterable)
-    if len(elements) == 0:
-        return set()
 
-    return set.union(*elements)
+def is_splittable(grid_vector, height_segments, width_segments):
+    return common_type(grid_vector) is Grid and all(
+        grid.height % height_segments == 0 and grid.width % width_segments == 0
+        for grid in grid_vector
+    )
 
 
 class NoSample(Exception):
     pass
-
-
-_py_random = random.Random(0)
-_np_random = np.random.RandomState(0)
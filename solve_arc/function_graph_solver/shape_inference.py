@@ -0,0 +1,145 @@
+"""
+static shape inference to prune functions before evaluation, which have arguments
+with mismatching shapes or can not reach the shape of the target in the remaining depth
+"""
+
+import functools
+
+from ..language import *
+
+# upper bound of min_steps
+MAX_STEPS = 2
+
+
+class ShapePruning:
+    """check for function memo, if function of operation and argument nodes is doomed"""
+
+    def __init__(self, target, max_depth):
+        self.target_shapes = tuple(element.shape for element in target)
+        self.max_depth = max_depth
+        # function -> signature and indices of non-scalar args (None if unregistered)
+        self._signatures = {}
+
+    def __call__(self, operation, args):
+        # key on wrapped function, as hashing wrapper is comparably slow
+        function = getattr(operation, "func", None)
+        if function not in self._signatures:
+            self._signatures[function] = _signature(function)
+
+        if self._signatures[function] is None:
+            return False
+
+        signature, shape_args = self._signatures[function]
+        remaining_depth = self.max_depth - (1 + max(arg.depth for arg in args))
+        if remaining_depth >= MAX_STEPS and len(signature.preconditions) == 0:
+            # neither invalid shapes nor unreachable target shape to detect
+            return False
+
+        arg_vectors = [args[index]() for index in shape_args]
+        for elements, target_shape in zip(zip(*arg_vectors), self.target_shapes):
+            shape = infer_shape(signature, elements)
+            if shape is None:
+                return True
+
+            result_type = _result_type(signature, elements)
+            if min_steps(result_type, shape, target_shape) > remaining_depth:
+                return True
+
+        return False
+
+
+def _signature(function):
+    signature = operations.get(function)
+    if signature is None:
+        return None
+
+    shape_args = [
+        index
+        for index in range(len(signature.arg_types))
+        if index not in signature.scalar_args
+    ]
+    return signature, shape_args
+
+
+def infer_shape(signature, elements):
+    """shape of result of operation for non-scalar argument elements of constraint
+
+    None if result is invalid, UNKNOWN_SHAPE if operation has no shape transfer function
+    """
+    if signature.infer_shape is None:
+        return UNKNOWN_SHAPE
+
+    shapes = [abstract_shape(element) for element in elements]
+    if any(shape is None for shape in shapes):
+        return None
+
+    return signature.infer_shape(*shapes)
+
+
+def abstract_shape(element):
+    """shape of grid / selection, tuple of shapes for sequences"""
+    type_ = type(element)
+    if type_ is Grid or type_ is Selection:
+        return element.shape
+
+    if type_ is Grids or type_ is Selections:
+        return tuple(item.shape for item in element)
+
+    return None
+
+
+def _result_type(signature, elements):
+    if not isinstance(signature.result_type, tuple):
+        return signature.result_type
+
+    # alternative result types follow alternative types of first argument
+    alternatives_ = alternatives(signature.arg_types[0])
+    if type(elements[0]) in alternatives_:
+        return signature.result_type[alternatives_.index(type(elements[0]))]
+
+    return Grid
+
+
+@functools.lru_cache(maxsize=None)
+def min_steps(result_type, shape, target_shape):
+    """lower bound of functions needed to get from value to grid with target shape
+
+    a single function can only keep the shape of a grid, transpose it, shrink it
+    (i.e. extract area) or extend one dimension (i.e. concatenate with other grid),
+    selections need a function to get to a grid with their shape or a smaller one
+    """
+    if result_type is Grid:
+        if shape is UNKNOWN_SHAPE or shape == target_shape:
+            return 0
+
+        if (
+            transposed_shape(shape) == target_shape
+            or _is_shrinkable(shape, target_shape)
+            or _is_extendable(shape, target_shape)
+        ):
+            return 1
+
+        return 2
+
+    if result_type is Selection:
+        if (
+            shape is UNKNOWN_SHAPE
+            or shape == target_shape
+            or _is_shrinkable(shape, target_shape)
+        ):
+            return 1
+
+        return 2
+
+    # sequences need at least a function to take or concatenate elements
+    return 1
+
+
+def _is_shrinkable(shape, target_shape):
+    return shape[0] >= target_shape[0] and shape[1] >= target_shape[1]
+
+
+def _is_extendable(shape, target_shape):
+    return (shape[0] == target_shape[0] and shape[1] < target_shape[1]) or (
+        shape[1] == target_shape[1] and shape[0] < target_shape[0]
+    )
@@ -6,6 +6,7 @@ import logging
 
 from . import sampling_search
 from . import full_search
+from . import portfolio_search
 from .nodes import *
 from .vectorize import repeat_once, Vector
 
@@ -14,17 +15,60 @@ logger = logging.getLogger(__name__)
 Constraint = namedtuple("Constraint", ["source", "target"])
 
 
-_graph_factories = {"full": full_search.Graph, "sampling": sampling_search.Graph}
+_graph_factories = {
+    "full": full_search.Graph,
+    "sampling": sampling_search.Graph,
+    "portfolio": portfolio_search.Graph,
+}
 
 
-def solve(constraints, search_strategy="full", **kwargs):
+def solve(
+    constraints,
+    search_strategy="full",
+    subset_size=None,
+    max_false_positives=3,
+    **kwargs
+):
+    """search function which maps sources to targets of all constraints
+
+    subset_size: opt-in, search on this number of cheapest constraints and check
+        functions matching them on remaining constraints only then, add a constraint
+        and restart search after max_false_positives functions failed the check
+    """
     target = Vector(constraint.target for constraint in constraints)
     source_node = Source(Vector(constraint.source for constraint in constraints))
 
     if source_node() == target:
         return Solution(source_node, source_node)
 
-    logger.debug("solving with: %s search", search_strategy)
+    if subset_size is None or subset_size >= len(constraints):
+        return _search(constraints, search_strategy, **kwargs)
+
+    # evaluating functions is roughly linear in size of grids
+    constraints = sorted(constraints, key=_size)
+    for size in range(subset_size, len(constraints)):
+        verification = Verification(constraints[size:], max_false_positives)
+        try:
+            return _search(
+                constraints[:size], search_strategy, verify=verification, **kwargs
+            )
+        except Escalation:
+            logger.debug(
+                "%d false positives on %d constraints, escalating",
+                verification.false_positives,
+                size,
+            )
+
+    return _search(constraints, search_strategy, **kwargs)
+
+
+def _search(constraints, search_strategy, **kwargs):
+    target = Vector(constraint.target for constraint in constraints)
+    source_node = Source(Vector(constraint.source for constraint in constraints))
+
+    logger.debug(
+        "solving with: %s search on %d constraints", search_strategy, len(constraints)
+    )
     graph = _graph_factories[search_strategy]({source_node}, target, **kwargs)
     solution = graph.solve()
 
@@ -36,6 +80,70 @@ def solve(constraints, search_strategy="full", **kwargs):
     return None
 
 
+def _size(constraint):
+    return _cells(constraint.source) + _cells(constraint.target)
+
+
+def _cells(value):
+    """number of cells of grid or sequence of grids"""
+    if hasattr(value, "state"):
+        return value.state.size
+
+    return sum(_cells(element) for element in value)
+
+
+class Escalation(Exception):
+    pass
+
+
+class Verification:
+    """check of functions, which match target on subset of constraints, on remaining
+    constraints, raises Escalation when too many functions failed the check
+    """
+
+    def __init__(self, constraints, max_false_positives):
+        self.source = Vector(constraint.source for constraint in constraints)
+        self.target = Vector(constraint.target for constraint in constraints)
+        self.max_false_positives = max_false_positives
+        # by identity, as equality of nodes only depends on value on subset
+        self._rejected = {}
+
+    @property
+    def false_positives(self):
+        return len(self._rejected)
+
+    def __call__(self, node):
+        if id(node) in self._rejected:
+            # i.e. resampled from memo
+            return False
+
+        if evaluate(node, self.source) == self.target:
+            return True
+
+        self._rejected[id(node)] = node
+        if self.false_positives >= self.max_false_positives:
+            raise Escalation()
+
+        return False
+
+
+def evaluate(node, source, values=None):
+    """value of node for different source, without replacing cached values of nodes"""
+    if isinstance(node, Source):
+        return source
+
+    if not isinstance(node, Function):
+        return node()
+
+    # nodes shared by multiple functions are only evaluated once
+    values = {} if values is None else values
+    if id(node) not in values:
+        args = [evaluate(arg, source, values) for arg in node.args]
+        values[id(node)] = node.operation(*args)
+
+    return values[id(node)]
+
+
 class Source(Constant):
     def load(self, value):
         """replace value for transfer of program to different inputs"""
@@ -65,17 +173,36 @@ class Solution:
 
 
 class Statistics(
-    namedtuple("Statistics", ["depth", "branching_factor", "nodes_count"])
+    namedtuple(
+        "Statistics",
+        ["depth", "branching_factor", "nodes_count", "memo_hits", "memo_misses"],
+    )
 ):
     @classmethod
     def from_graph(cls, node, graph):
+        if isinstance(graph, portfolio_search.Graph):
+            return cls.from_summaries(node, graph.summaries)
+
         statistics = cls(
             depth=node.depth,
             branching_factor=branching_factor(graph),
             nodes_count=len(graph.nodes),
+            memo_hits=graph.function.hits,
+            memo_misses=graph.function.misses,
         )
         return statistics
 
+    @classmethod
+    def from_summaries(cls, node, summaries):
+        """merge statistics of all graphs in portfolio"""
+        return cls(
+            depth=node.depth,
+            branching_factor=mean(summary.branching_factor for summary in summaries),
+            nodes_count=sum(summary.nodes_count for summary in summaries),
+            memo_hits=sum(summary.memo_hits for summary in summaries),
+            memo_misses=sum(summary.memo_misses for summary in summaries),
+        )
+
     def __str__(self):
         return ", ".join(
             "{}: {:.2f}".format(field, getattr(self, field)) for field in self._fields
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from ..language import *
+from .batched import kernels
+from .vectorize import *
+
+
+def _random_vector(element_type, shape, num_elements=3, seed=0):
+    random = np.random.RandomState(seed)
+    if element_type == Grid:
+        states = random.choice([0, 0, 1, 2, 3], size=(num_elements,) + shape)
+    else:
+        states = random.choice([False, True], size=(num_elements,) + shape)
+
+    return Vector(element_type(state) for state in states)
+
+
+def _args(arg_types, shape, seed):
+    args = []
+    for index, arg_type in enumerate(arg_types):
+        if arg_type is None:
+            args.append(repeat([1, 2][index % 2]))
+        else:
+            args.append(_random_vector(arg_type, shape, seed=seed + index))
+
+    return args
+
+
+@pytest.mark.parametrize("operation", list(kernels.keys()), ids=lambda op: op.__name__)
+def test_kernels_match_elementwise_application(operation):
+    _, arg_types, _ = kernels[operation]
+
+    for seed in range(10):
+        args = _args(arg_types, (3, 4), seed)
+
+        batched = vectorize(operation)(*args)
+        expected = Vector(operation(*elements) for elements in zip(*args))
+        if None in expected:
+            expected = INVALID_VECTOR
+
+        assert batched == expected
+
+
+def test_vectorize__batched_results_share_stacked_state():
+    grids = _random_vector(Grid, (3, 4))
+
+    flipped = vectorize(flip_up_down)(grids)
+
+    assert flipped.stacked is not None
+    assert np.shares_memory(flipped.stacked, grids.stacked)
+    assert np.shares_memory(flipped[0].state, flipped.stacked)
+
+
+def test_vectorize__ragged_fallback():
+    grids = Vector([Grid([[1, 2]]), Grid([[1], [2]])])
+
+    assert grids.stacked is None
+    assert vectorize(map_color)(grids, repeat(1), repeat(3)) == Vector(
+        [Grid([[3, 2]]), Grid([[3], [2]])]
+    )
+
+
+def test_vectorize__different_shapes_fallback():
+    a = Vector([Grid([[1, 2]])])
+    b = Vector([Grid([[1], [2]])])
+
+    assert vectorize(elementwise_equal_and)(a, b) is INVALID_VECTOR
+
+
+def test_vectorize__invalid_elements():
+    a = Vector([Grid([[1, 2]]), Grid([[1, 0]])])
+    b = Vector([Grid([[2, 2]]), Grid([[0, 3]])])
+
+    combined = vectorize(elementwise_equal_and)(a, b)
+
+    assert combined is INVALID_VECTOR
+    assert not is_valid(combined)
+
+
+def test_vectorize__invalid_args():
+    assert vectorize(flip_up_down)(INVALID_VECTOR) is INVALID_VECTOR
+
+
+def test_vectorize__tries_last_invalid_constraint_first():
+    calls = []
+
+    def half_height(grid):
+        calls.append(grid)
+        return split_top_bottom(grid)
+
+    grids = Vector([Grid([[1], [2]]), Grid([[3]]), Grid([[4], [5]])])
+
+    assert vectorize(half_height)(grids) is INVALID_VECTOR
+    assert calls == list(grids[:2])
+
+    calls.clear()
+    assert vectorize(half_height)(grids) is INVALID_VECTOR
+    assert calls == [grids[1]]
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from ..language import *
+from .color_inference import *
+from .nodes import Constant
+from .test_shape_inference import _random_element
+from .vectorize import *
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [operation for operation in operations.values() if operation.infer_colors],
+    ids=lambda operation: operation.function.__name__,
+)
+def test_infer_colors__matches_evaluation(operation):
+    random = np.random.RandomState(0)
+
+    for _ in range(200):
+        args = [
+            _random_element(alternatives(arg_type)[0], random)
+            for arg_type in operation.arg_types
+        ]
+
+        inferred = operation.infer_colors(*(abstract_colors(arg) for arg in args))
+        result = operation.function(*args)
+
+        if inferred is None:
+            assert result is None
+        elif result is not None and inferred is not UNKNOWN_COLORS:
+            assert inferred == abstract_colors(result)
+
+
+def test_switched_colors():
+    assert switched_colors(frozenset([1, 2, 3]), 1, 4) == frozenset([4, 2, 3])
+    assert switched_colors(frozenset([1, 2, 3]), 1, 2) == frozenset([1, 2, 3])
+
+
+@pytest.fixture
+def grid_node():
+    return Constant(Vector([Grid([[1, 2]]), Grid([[1, 2, 3]])]))
+
+
+def test_color_pruning(grid_node):
+    target = Vector([Grid([[1, 4]]), Grid([[1, 4, 3]])])
+    prune = ColorPruning(target, max_depth=1)
+
+    def map_color_args(a, b):
+        return grid_node, Constant(repeat(a)), Constant(repeat(b))
+
+    assert not prune(vectorize(map_color), map_color_args(2, 4))
+    assert prune(vectorize(map_color), map_color_args(1, 4))
+    assert prune(vectorize(flip_up_down), (grid_node,))
+    # colors may still be changed with more remaining depth
+    prune = ColorPruning(target, max_depth=2)
+    assert not prune(vectorize(flip_up_down), (grid_node,))
+
+
+def test_vector_palettes():
+    vector = Vector([Grid([[1, 2]]), Selection([[True]])])
+
+    assert vector.palettes == (frozenset([1, 2]), None)
+    assert vector.palettes is vector.palettes
+    assert palettes(repeat_once(Grid([[3]]))) == (frozenset([3]),)
@@ -1,8 +1,10 @@
 import pytest
 
 from .full_search import *
+from .full_search import _initialize_worker
 from .vectorize import *
-from .nodes import Constant
+from .nodes import Constant, FunctionMemo, INVALID
+from .loss import loss
 
 
 @pytest.fixture
@@ -55,6 +57,21 @@ def selection_node_2():
     )
 
 
+@pytest.fixture
+def selection_node_3():
+    return Constant(
+        repeat_once(
+            Selection.from_string(
+                """
+                . . .
+                . # #
+                . # .
+                """
+            )
+        )
+    )
+
+
 @pytest.fixture
 def selection_node_wrong_size():
     return Constant(
@@ -154,20 +171,141 @@ def graph():
                 """
             )
         )
+        function = FunctionMemo(is_valid)
 
     return Graph()
 
 
 def test_extract_selected_area_functions(
-    graph, grid_node, selection_node_1, selection_node_2
+    graph, grid_node, selection_node_1, selection_node_3
 ):
-    nodes = NodeCollection([grid_node, selection_node_1, selection_node_2])
+    nodes = NodeCollection([grid_node, selection_node_1, selection_node_3])
     functions = extract_selected_area_functions(nodes, graph)
 
+    # selection 1 spans whole grid, which is pointless and therefore invalid
     assert functions == {
-        Function(vectorize(extract_selected_area), grid_node, selection_node_1),
-        Function(vectorize(extract_selected_area), grid_node, selection_node_2),
+        INVALID,
+        Function(vectorize(extract_selected_area), grid_node, selection_node_3),
+    }
+
+
+def test_signature_args(
+    grid_node, grids_node, selection_node_1, selection_node_wrong_size, selections_node
+):
+    nodes = NodeCollection(
+        [
+            grid_node,
+            grids_node,
+            selection_node_1,
+            selection_node_wrong_size,
+            selections_node,
+        ]
+    )
+
+    assert set(signature_args(nodes, operations[take_first])) == {
+        (grids_node,),
+        (selections_node,),
     }
+    # only pairs with same shape
+    assert set(signature_args(nodes, operations[rotate_90_within_bounds])) == {
+        (grid_node, selection_node_1)
+    }
+
+
+def test_signature_args__not_derivable(grid_node):
+    nodes = NodeCollection([grid_node])
+
+    with pytest.raises(ValueError):
+        signature_args(nodes, operations[concatenate_left_right])
+
+
+def test_generate_functions__drops_invalid(graph, grid_node, selection_node_1):
+    nodes = NodeCollection([grid_node, selection_node_1])
+    functions = generate_functions(nodes, graph)
+
+    assert len(functions) > 0
+    assert INVALID not in functions
+    assert all(is_valid(function()) for function in functions)
+
+
+def test_generate_functions__counts_usages_on_memo_hits(graph, grid_node):
+    nodes = NodeCollection([grid_node])
+
+    generate_functions(nodes, graph)
+    usages = grid_node.usages
+    misses = graph.function.misses
+    generate_functions(nodes, graph)
+
+    # regenerating only hits memo, but usages still grow to limit expansions
+    assert graph.function.misses == misses
+    assert grid_node.usages == 2 * usages
+
+
+def test_color_chain(graph, grid_node):
+    mapped = graph.function(
+        vectorize(map_color), grid_node, Constant(repeat(3)), Constant(repeat(1))
+    )
+    switched = graph.function(
+        vectorize(switch_color), mapped, Constant(repeat(1)), Constant(repeat(2))
+    )
+
+    base_key, colors, table = color_chain(switched)
+
+    assert base_key == id(grid_node)
+    assert colors == tuple(range(1, 10))
+    assert list(table[:5]) == [0, 2, 1, 2, 4]
+
+
+def test_map_color_functions__skips_equivalent_chains(graph, grid_node):
+    map_3_to_1 = graph.function(
+        vectorize(map_color), grid_node, Constant(repeat(3)), Constant(repeat(1))
+    )
+    map_1_to_2 = graph.function(
+        vectorize(map_color), grid_node, Constant(repeat(1)), Constant(repeat(2))
+    )
+    nodes = NodeCollection([map_3_to_1, map_1_to_2])
+    misses = graph.function.misses
+
+    functions = map_color_functions(nodes, graph)
+
+    # i.e. mapping 1 to 2 after 3 to 1 is equivalent to mapping 3 to 2 after 1 to 2,
+    # so only functions with distinct values are evaluated
+    assert len(functions) > 0
+    assert graph.function.misses - misses == len(functions)
+
+
+def test_symmetry_functions__skips_equivalent_chains(graph, grid_node):
+    rotated = graph.function(vectorize(rotate_90), grid_node)
+    nodes = NodeCollection([rotated])
+
+    functions = symmetry_functions(nodes, graph)
+
+    # rotate_270 would transform back to grid node
+    assert Function(vectorize(rotate_270), rotated) not in functions
+    assert graph.function(vectorize(rotate_180), rotated) in functions
+    assert len(functions) == 4
+
+
+def test_symmetry_functions__skips_invariant(graph):
+    symmetric_node = Constant(
+        repeat_once(
+            Grid.from_string(
+                """
+                1 2 1
+                3 4 3
+                """
+            )
+        )
+    )
+    nodes = NodeCollection([symmetric_node])
+
+    functions = symmetry_functions(nodes, graph)
+
+    assert vectorize(flip_left_right) not in {
+        function.operation for function in functions
+    }
+    # flip up down and rotate 180 have equal values
+    assert len(functions) == 3
 
 
 def test_set_selected_to_color_functions(
@@ -202,3 +340,55 @@ def test_set_selected_to_color_functions(
             Constant(repeat_once(2)),
         ),
     }
+
+
+def test_graph_expand__likelihoods_follow_usages(grid_node):
+    target = repeat_once(Grid.from_string("9 8"))
+    graph = Graph({grid_node}, target, expand_batch_size=10)
+
+    for _ in range(3):
+        assert graph._expand() is None
+
+    for node in graph.expandable_nodes:
+        if node.usages > graph.max_usages:
+            expected = 0
+        else:
+            expected = 0.1 + 1 / loss(node, target)
+        assert graph._candidates.weight(node) == pytest.approx(expected)
+
+
+def test_matching_shape_pairs(
+    grid_node, selection_node_1, selection_node_2, selection_node_wrong_size
+):
+    nodes = NodeCollection(
+        [grid_node, selection_node_1, selection_node_2, selection_node_wrong_size]
+    )
+
+    pairs = set(matching_shape_pairs(nodes, Grid, Selection))
+
+    assert pairs == {(grid_node, selection_node_1), (grid_node, selection_node_2)}
+
+
+@pytest.mark.slow
+def test_graph_expand__parallel_generates_same_functions(grid_node):
+    target = repeat_once(Grid.from_string("9 8"))
+    serial = Graph({grid_node}, target, expand_batch_size=10)
+    serial._expand()
+    nodes = NodeCollection(serial.nodes)
+
+    parallel = Graph(set(serial.nodes), target, expand_workers=2)
+    parallel._executor = ProcessPoolExecutor(
+        max_workers=2,
+        initializer=_initialize_worker,
+        initargs=(target, parallel.max_depth),
+    )
+    try:
+        parallel_functions = parallel._generate_functions_parallel(nodes)
+    finally:
+        parallel._executor.shutdown()
+
+    serial_functions = generate_functions(nodes, serial)
+    assert parallel_functions == serial_functions
+    assert {str(function) for function in parallel_functions} == {
+        str(function) for function in serial_functions
+    }
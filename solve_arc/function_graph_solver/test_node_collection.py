@@ -1,3 +1,6 @@
+import random
+from collections import Counter
+
 import pytest
 
 from .node_collection import *
@@ -231,3 +234,81 @@ def test_node_collections(
     }
     assert nodes.with_width((2,)) == {selection_node_3, grids_node, selections_node}
     assert nodes.with_width.matching_sequences == {grids_node, selections_node}
+
+
+def test_sample__intersection(
+    grid_node_1, selection_node_1, selection_node_2, selection_node_3
+):
+    nodes = NodeCollection(
+        [grid_node_1, selection_node_1, selection_node_2, selection_node_3]
+    )
+    rng = random.Random(0)
+
+    sampled = {
+        nodes.sample(rng, nodes.with_type(Selection), nodes.with_height((3,)))
+        for _ in range(100)
+    }
+
+    assert sampled == {selection_node_1, selection_node_2}
+
+
+def test_sample__exclude(selection_node_1, selection_node_2, selection_node_3):
+    nodes = NodeCollection([selection_node_1, selection_node_2, selection_node_3])
+    rng = random.Random(0)
+
+    sampled = {
+        nodes.sample(
+            rng, nodes.with_type(Selection), exclude=nodes.with_height((3,))
+        )
+        for _ in range(100)
+    }
+
+    assert sampled == {selection_node_3}
+    assert nodes.sample(rng, nodes.with_type(Grid)) is None
+
+
+def test_sample__weights_follow_usages(grid_node_1, grid_node_2):
+    nodes = NodeCollection([grid_node_1, grid_node_2])
+    rng = random.Random(0)
+    nodes.sample(rng, nodes.with_type(Grid))
+
+    grid_node_1.usages = 90
+    nodes.update_weights([grid_node_1])
+    counts = Counter(nodes.sample(rng, nodes.with_type(Grid)) for _ in range(1000))
+
+    # weights 1 / (0.1 * 90 + 1) and 1
+    assert 0.05 < counts[grid_node_1] / 1000 < 0.15
+
+
+def test_with_matching_shapes(
+    grid_node_1, grid_node_2, selection_node_1, selection_node_2, selection_node_3
+):
+    nodes = NodeCollection([grid_node_1, grid_node_2, selection_node_3])
+
+    matching = nodes.with_matching_shapes(Grid, Selection)
+    distinct_selections = nodes.with_matching_shapes(
+        Selection, Selection, replace=False
+    )
+
+    assert matching == set()
+    assert distinct_selections == set()
+
+    # maintained as nodes are added
+    nodes.add(selection_node_1)
+    assert matching == {grid_node_1}
+    assert distinct_selections == set()
+
+    nodes.add(selection_node_2)
+    assert matching == {grid_node_1}
+    assert distinct_selections == {selection_node_1, selection_node_2}
+
+
+def test_pool(grid_node_1, grid_node_2, selection_node_1):
+    nodes = NodeCollection([grid_node_1, selection_node_1])
+
+    pool = nodes.pool("grids", lambda node: node in nodes.with_type(Grid))
+    assert pool == {grid_node_1}
+
+    nodes.add(grid_node_2)
+    assert pool == {grid_node_1, grid_node_2}
+    assert nodes.pool("grids", None) is pool
@@ -209,3 +209,88 @@ def test_function__hash_of_chained_functions():
     assert hash(Function(add, arg_a, Function(multiply, arg_d, arg_e))) == hash(
         reference
     )
+
+
+class CountCalls:
+    def __init__(self, result=42):
+        self.result = result
+        self.call_count = 0
+
+    def __call__(self, *args):
+        self.call_count += 1
+        return self.result
+
+
+def test_function_memo__hit_returns_same_node_without_evaluation():
+    memo = FunctionMemo()
+    operation = CountCalls()
+    arg = Constant(1)
+
+    function = memo(operation, arg)
+    assert isinstance(function, Function)
+    assert operation.call_count == 1
+
+    assert memo(operation, arg) is function
+    # equal constant value is the same key
+    assert memo(operation, Constant(1)) is function
+    assert operation.call_count == 1
+
+
+def test_function_memo__hit_counts_usages():
+    memo = FunctionMemo()
+    arg = Constant(1)
+
+    for _ in range(5):
+        memo(CountCalls, arg)
+
+    assert arg.usages == 5
+
+
+def test_function_memo__function_args_keyed_on_identity():
+    memo = FunctionMemo()
+    operation = CountCalls()
+    # equal values, but different nodes
+    a = Function(lambda: 1)
+    b = Function(lambda: 1)
+
+    assert memo(operation, a) is not memo(operation, b)
+    assert operation.call_count == 2
+
+
+def test_function_memo__invalid_cached():
+    memo = FunctionMemo(is_valid=lambda value: value is not None)
+    operation = CountCalls(result=None)
+
+    assert memo(operation) is INVALID
+    assert memo(operation) is INVALID
+    assert operation.call_count == 1
+
+
+def test_function_memo__hit_and_miss_counters():
+    memo = FunctionMemo()
+    operation_a = CountCalls()
+    operation_b = CountCalls()
+
+    memo(operation_a, Constant(1))
+    memo(operation_a, Constant(1))
+    memo(operation_a, Constant(2))
+    memo(operation_b, Constant(1))
+    memo(operation_b, Constant(1))
+
+    assert memo.misses == 3
+    assert memo.hits == 2
+    assert len(memo) == 3
+
+
+def test_function_memo__no_reference_beyond_max_depth():
+    memo = FunctionMemo(max_depth=1)
+    operation = CountCalls()
+
+    function = memo(operation, Constant(1))
+    assert isinstance(function, Function)
+    assert function.depth == 1
+    assert len(memo) == 0
+
+    # not memoized, so evaluated again
+    assert memo(operation, Constant(1)) is not function
+    assert operation.call_count == 2
@@ -0,0 +1,42 @@
+import pytest
+
+from ..language import *
+from .portfolio_search import *
+from .solver import solve, Constraint, Source
+from .vectorize import Vector
+
+
+def test_graph_solve__relinks_initial_nodes():
+    source = Source(Vector([Grid.from_string("1 2 2")]))
+    target = Vector([Grid.from_string("2 1 1")])
+    graph = Graph({source}, target, portfolio_size=2, max_depth=1)
+
+    solution = graph.solve()
+
+    assert solution is not None
+    assert solution() == target
+    assert source in solution.args and any(arg is source for arg in solution.args)
+    assert len(graph.summaries) == 2
+    assert any(summary.solved for summary in graph.summaries)
+
+
+def test_graph_solve__no_solution():
+    source = Source(Vector([Grid.from_string("1 2 3")]))
+    target = Vector([Grid.from_string("4 5 6")])
+    graph = Graph({source}, target, portfolio_size=2, max_depth=1, max_steps=100)
+
+    assert graph.solve() is None
+    assert {summary.seed for summary in graph.summaries} == {0, 1}
+    assert not any(summary.solved for summary in graph.summaries)
+
+
+def test_solve__portfolio_search_strategy():
+    source = Grid([[1, 2, 2]])
+    target = Grid([[2, 1, 1]])
+    constraints = [Constraint(source, target)]
+
+    solution = solve(constraints, "portfolio", portfolio_size=2, max_depth=1)
+
+    assert solution is not None
+    assert solution(Grid([[1, 1, 2]])) == Grid([[2, 2, 1]])
+    assert solution.statistics.nodes_count > 0
@@ -37,8 +37,10 @@ def test_graph_step__max_steps():
     graph.function_sampler.operation_weights = {map_color: 1.0}
     graph.solve()
 
+    # one function per step, resampled functions are deduplicated
+    assert graph.function.hits + graph.function.misses == 3
     created_nodes = graph.nodes - initial_nodes
-    assert len(created_nodes) == 3
+    assert len(created_nodes) == graph.function.misses
 
 
 def test_graph_solve__find_target():
@@ -63,6 +65,25 @@ def test_graph_solve__find_target():
     )
 
 
+def test_graph_solve__skip_invalid():
+    source = Vector([Grid.from_string("1 2 3 4 5")])
+    target = Vector([Grid.from_string("6 7 8 9 0")])
+    initial_nodes = {Constant(source)}
+    graph = Graph(initial_nodes, target, max_steps=10)
+
+    # splitting odd width is always invalid
+    graph.function_sampler.operation_weights = {split_left_right: 1.0}
+    graph.function_sampler.sample_args[split_left_right] = lambda: (
+        next(iter(initial_nodes)),
+    )
+    solution = graph.solve()
+
+    assert solution is None
+    assert graph.nodes == initial_nodes
+    assert graph.function.misses == 1
+    assert graph.function.hits == 9
+
+
 @pytest.fixture
 def all_args():
     return {
@@ -82,6 +103,9 @@ def all_args():
         Constant(
             Vector([Selection.from_string(". # #"), Selection.from_string(". # #")])
         ),
+        Constant(
+            Vector([Selection.from_string("# ."), Selection.from_string("# . #")])
+        ),
         # matching shape grids
         Constant(
             Vector(
@@ -171,6 +195,15 @@ def test_function_sampler__sample_matching_shape_args(
             assert len(set(nodes)) == len(nodes)
 
 
+def test_function_sampler__samplers_of_all_operations(all_args, dummy_target):
+    graph = Graph(all_args, dummy_target)
+    function_sampler = FunctionSampler(graph)
+
+    assert set(function_sampler.sample_args.keys()) == set(operations.keys())
+    assert function_sampler.operation_weights[fill_grid] == DISABLED
+    assert function_sampler.operation_weights[rotate_90_within_bounds] > 0
+
+
 def test_function_sampler__all_functions_smoketest(all_args, dummy_target):
     repetitions = 100
     graph = Graph(all_args, dummy_target)
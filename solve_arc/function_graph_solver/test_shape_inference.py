@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from ..language import *
+from .nodes import Constant, Function, FunctionMemo, INVALID
+from .shape_inference import *
+from .vectorize import *
+
+
+def _random_element(arg_type, random):
+    shape = tuple(random.choice([1, 2, 3, 4, 6], size=2))
+    if arg_type is Color:
+        return int(random.randint(0, 3))
+    if arg_type is Grid:
+        return Grid(random.randint(0, 3, size=shape))
+    if arg_type is Selection:
+        return Selection(random.choice([False, True], size=shape))
+
+    element_type = Grid if arg_type is Grids else Selection
+    length = random.randint(0, 4)
+    return arg_type(_random_element(element_type, random) for _ in range(length))
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [operation for operation in operations.values() if operation.infer_shape],
+    ids=lambda operation: operation.function.__name__,
+)
+def test_infer_shape__matches_evaluation(operation):
+    random = np.random.RandomState(0)
+
+    for _ in range(200):
+        args = [
+            _random_element(alternatives(arg_type)[0], random)
+            for arg_type in operation.arg_types
+        ]
+        elements = [
+            arg for index, arg in enumerate(args) if index not in operation.scalar_args
+        ]
+
+        inferred = infer_shape(operation, elements)
+        result = operation.function(*args)
+
+        if inferred is None:
+            assert result is None
+        elif result is not None:
+            assert inferred == abstract_shape(result)
+
+
+def test_infer_shape__unknown():
+    grid = Grid([[1, 2]])
+
+    assert infer_shape(operations[extract_islands], [grid]) is UNKNOWN_SHAPE
+
+
+def test_min_steps():
+    target = (2, 4)
+
+    assert min_steps(Grid, (2, 4), target) == 0
+    assert min_steps(Grid, UNKNOWN_SHAPE, target) == 0
+    assert min_steps(Grid, (4, 2), target) == 1
+    assert min_steps(Grid, (3, 5), target) == 1
+    assert min_steps(Grid, (2, 1), target) == 1
+    assert min_steps(Grid, (1, 1), target) == 2
+    assert min_steps(Grid, (1, 5), target) == 2
+    assert min_steps(Selection, (2, 4), target) == 1
+    assert min_steps(Selection, (1, 4), target) == 2
+    assert min_steps(Grids, ((1, 1),), target) == 1
+
+
+@pytest.fixture
+def grid_node():
+    return Constant(Vector([Grid([[1, 2]]), Grid([[1, 2, 3]])]))
+
+
+def test_shape_pruning__invalid_shapes(grid_node):
+    prune = ShapePruning(grid_node(), max_depth=10)
+    other_node = Constant(Vector([Grid([[1], [2]]), Grid([[1, 2, 3]])]))
+
+    assert prune(vectorize(concatenate_left_right), (grid_node, other_node))
+    assert not prune(vectorize(concatenate_left_right), (grid_node, grid_node))
+    assert prune(vectorize(elementwise_xor), (grid_node, other_node))
+
+
+def test_shape_pruning__unreachable_target(grid_node):
+    target = Vector([Grid([[1], [2]]), Grid([[1], [2], [3]])])
+    prune = ShapePruning(target, max_depth=1)
+
+    assert not prune(vectorize(rotate_90), (grid_node,))
+    assert prune(vectorize(flip_up_down), (grid_node,))
+    assert prune(vectorize(select_color), (grid_node, Constant(repeat(1))))
+    # can still be transformed with more remaining depth
+    prune = ShapePruning(target, max_depth=2)
+    assert not prune(vectorize(flip_up_down), (grid_node,))
+
+
+def test_function_memo__pruned(grid_node):
+    memo = FunctionMemo(prune=[lambda operation, args: True])
+
+    assert memo(vectorize(flip_up_down), grid_node) is INVALID
+    assert memo(vectorize(flip_up_down), grid_node) is INVALID
+    assert memo.pruned == 1
+    assert memo.hits == 1
+    assert grid_node.usages == 2
@@ -3,7 +3,9 @@ import logging
 import pytest
 
 from ..language import *
+from .nodes import Function
 from .solver import *
+from .vectorize import vectorize, Vector, INVALID_VECTOR
 
 
 @pytest.fixture(params=["full", "sampling"])
@@ -168,3 +170,80 @@ def test_solve__split_and_get_first__multiple_constraints(search_strategy):
     assert solution is not None
     for source, target in constraints:
         assert solution(source) == target
+
+
+# constraint-subset search:
+
+
+@pytest.mark.parametrize("max_false_positives", [1, 3])
+def test_solve__subset__multiple_constraints(search_strategy, max_false_positives):
+    constraints = [
+        Constraint(source=Grid([[1, 2, 2]]), target=Grid([[2, 1, 1]])),
+        # smallest constraint is also solved by flipping
+        Constraint(source=Grid([[1, 2]]), target=Grid([[2, 1]])),
+    ]
+
+    solution = solve(
+        constraints,
+        search_strategy,
+        max_depth=1,
+        subset_size=1,
+        max_false_positives=max_false_positives,
+    )
+
+    assert solution is not None
+    for source, target in constraints:
+        assert solution(source) == target
+
+
+def test_solve__subset__no_solution(search_strategy):
+    constraints = [
+        Constraint(source=Grid([[1, 2]]), target=Grid([[2, 1]])),
+        Constraint(source=Grid([[1, 2]]), target=Grid([[1, 2]])),
+    ]
+
+    solution = solve(constraints, search_strategy, max_depth=1, subset_size=1)
+
+    assert solution is None
+
+
+def test_evaluate__keeps_cached_values():
+    source_node = Source(Vector([Grid([[1, 2]])]))
+    function = Function(vectorize(flip_left_right), source_node)
+    function()
+
+    value = evaluate(function, Vector([Grid([[3, 4]]), Grid([[5, 6]])]))
+
+    assert value == Vector([Grid([[4, 3]]), Grid([[6, 5]])])
+    assert function() == Vector([Grid([[2, 1]])])
+
+
+def test_evaluate__invalid():
+    source_node = Source(Vector([Grid([[1, 2]])]))
+    function = Function(vectorize(split_left_right), source_node)
+
+    assert evaluate(function, Vector([Grid([[1, 2]]), Grid([[1, 2, 3]])])) is INVALID_VECTOR
+
+
+def test_verification__escalates_after_max_false_positives():
+    source_node = Source(Vector([Grid([[1, 2]])]))
+    verification = Verification([Constraint(Grid([[1, 2]]), Grid([[2, 1]]))], 2)
+
+    assert verification(Function(vectorize(flip_left_right), source_node))
+    assert not verification(source_node)
+    # same node is only counted once
+    assert not verification(source_node)
+    with pytest.raises(Escalation):
+        verification(Function(vectorize(flip_up_down), source_node))
+
+
+@pytest.mark.slow
+def test_solve__full_search_with_expand_workers():
+    source = Grids([Grid([[1, 0, 0]]), Grid([[1, 1, 0]])])
+    target = Grid([[0, 1, 0]])
+    constraints = [Constraint(source, target)]
+
+    solution = solve(constraints, "full", max_depth=2, expand_workers=2)
+
+    assert solution is not None
+    assert solution(source) == target
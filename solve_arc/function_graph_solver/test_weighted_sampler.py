@@ -0,0 +1,66 @@
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from .weighted_sampler import *
+
+
+def test_weighted_sampler__distribution():
+    sampler = WeightedSampler([("a", 1.0), ("b", 3.0), ("c", 0.0)])
+    rng = random.Random(0)
+
+    counts = Counter(sampler.choices(rng, k=10000))
+
+    assert counts["c"] == 0
+    assert 0.2 < counts["a"] / 10000 < 0.3
+    assert 0.7 < counts["b"] / 10000 < 0.8
+
+
+def test_weighted_sampler__update():
+    sampler = WeightedSampler([("a", 1.0), ("b", 1.0)])
+    rng = random.Random(0)
+
+    sampler.update("a", 0)
+
+    assert sampler.weight("a") == 0
+    assert sampler.num_positive == 1
+    assert set(sampler.choices(rng, k=100)) == {"b"}
+
+
+def test_weighted_sampler__total_with_many_items():
+    sampler = WeightedSampler()
+    for index in range(1000):
+        sampler.add(index, index % 7)
+    for index in range(0, 1000, 3):
+        sampler.update(index, 1.0)
+
+    expected_total = sum(sampler.weight(index) for index in range(1000))
+    assert sampler.total == pytest.approx(expected_total)
+    assert len(sampler) == 1000
+
+
+def test_weighted_sampler__no_positive_weight():
+    sampler = WeightedSampler([("a", 0)])
+
+    with pytest.raises(ValueError):
+        sampler.sample(random.Random(0))
+
+
+def test_alias_table__distribution():
+    table = AliasTable([("a", 1.0), ("b", 3.0), ("c", 0.0), ("d", 4.0)])
+    np_random = np.random.RandomState(0)
+
+    counts = Counter(table.choices(np_random, k=10000))
+
+    assert len(table) == 3
+    assert counts["c"] == 0
+    assert 0.1 < counts["a"] / 10000 < 0.15
+    assert 0.35 < counts["b"] / 10000 < 0.4
+    assert 0.475 < counts["d"] / 10000 < 0.525
+
+
+def test_alias_table__no_positive_weight():
+    with pytest.raises(ValueError):
+        AliasTable([("a", 0)])
@@ -5,8 +5,54 @@ utilitiy function and classes to handle processing of multiple grids/selections
 
 import itertools
 
+import numpy as np
+
+from ..language import Grid, Selection
+from .batched import kernels
+
 
 class Vector(tuple):
+    @classmethod
+    def from_stacked(cls, element_type, stacked, valid=None):
+        """vector of grids / selections sharing the rows of stacked state,
+        INVALID_VECTOR if any is not valid
+        """
+        if valid is not None and not np.all(valid):
+            return INVALID_VECTOR
+
+        stacked = np.asarray(stacked, dtype=element_type.dtype)
+        stacked.flags.writeable = False
+        vector = cls(element_type(state) for state in stacked)
+        vector._stacked = stacked
+        return vector
+
+    @property
+    def stacked(self):
+        """states of all elements as single array of shape (n, height, width)
+
+        None unless elements are all grids or all selections of identical shape
+        """
+        if not hasattr(self, "_stacked"):
+            self._stacked = None
+            if (
+                len(self) > 0
+                and type(self[0]) in (Grid, Selection)
+                and all(type(element) == type(self[0]) for element in self)
+                and all(element.shape == self[0].shape for element in self)
+            ):
+                self._stacked = np.stack([element.state for element in self])
+                self._stacked.flags.writeable = False
+
+        return self._stacked
+
+    @property
+    def palettes(self):
+        """used colors of each element as frozenset (None for non-grids), cached"""
+        if not hasattr(self, "_palettes"):
+            self._palettes = tuple(_palette(element) for element in self)
+
+        return self._palettes
+
     def __str__(self):
         return "{}({})".format(
             self.__class__.__name__, ", ".join(str(element) for element in self)
@@ -18,6 +64,19 @@ class Vector(tuple):
         )
 
 
+class _InvalidVector(Vector):
+    """marker for vectors with an invalid element for any constraint
+
+    holds a single None, so it is neither valid nor equal to any valid vector
+    """
+
+    def __repr__(self):
+        return "INVALID_VECTOR"
+
+
+INVALID_VECTOR = _InvalidVector([None])
+
+
 class _FunctionWrapper:
     """wrapped function with hash only dependent on function"""
 
@@ -41,12 +100,95 @@ class _FunctionWrapper:
         return hash(self.func)
 
 
+def palettes(vector):
+    """used colors of each element of vector, cached if vector is Vector"""
+    if isinstance(vector, Vector):
+        return vector.palettes
+
+    return tuple(_palette(element) for element in vector)
+
+
+def _palette(element):
+    if not isinstance(element, Grid):
+        return None
+
+    return frozenset(element.used_colors())
+
+
 # break naming conventions for consistent decorator naming
 class vectorize(_FunctionWrapper):
-    """vectorized application of function"""
+    """vectorized application of function
+
+    uses batched kernel of function if available and applicable,
+    else applies function to each element, returns INVALID_VECTOR as soon as
+    function returns None for an element or any argument is INVALID_VECTOR
+    """
+
+    def __init__(self, func):
+        super().__init__(func)
+        self.kernel = kernels.get(func)
 
     def __call__(self, *arg_tuples):
-        return Vector(self.func(*args) for args in zip(*arg_tuples))
+        if any(arg_tuple is INVALID_VECTOR for arg_tuple in arg_tuples):
+            return INVALID_VECTOR
+
+        if self.kernel is not None:
+            result = _call_kernel(self.kernel, arg_tuples)
+            if result is not None:
+                return result
+
+        elements = list(zip(*arg_tuples))
+        order = _evaluation_order(self.func, len(elements))
+        results = [None] * len(elements)
+        for index in order:
+            results[index] = self.func(*elements[index])
+            if results[index] is None:
+                # move to front, so constraint is tried first next time
+                order.remove(index)
+                order.insert(0, index)
+                return INVALID_VECTOR
+
+        return Vector(results)
+
+
+# (function, number of constraints) -> indices of constraints, most recently invalid first
+_evaluation_orders = {}
+
+
+def _evaluation_order(func, length):
+    key = (func, length)
+    if key not in _evaluation_orders:
+        _evaluation_orders[key] = list(range(length))
+
+    return _evaluation_orders[key]
+
+
+def _call_kernel(kernel, arg_tuples):
+    """apply kernel to stacked states, None if args can not be stacked"""
+    result_type, arg_types, func = kernel
+    if len(arg_tuples) != len(arg_types):
+        return None
+
+    args = []
+    for arg_tuple, arg_type in zip(arg_tuples, arg_types):
+        if arg_type is None:
+            # only scalars identical for all constraints
+            if not isinstance(arg_tuple, _ValueWrapper):
+                return None
+            args.append(arg_tuple.value)
+        else:
+            if not isinstance(arg_tuple, Vector) or arg_tuple.stacked is None:
+                return None
+            if type(arg_tuple[0]) != arg_type:
+                return None
+            args.append(arg_tuple.stacked)
+
+    stacked_args = [arg for arg in args if isinstance(arg, np.ndarray)]
+    if any(arg.shape != stacked_args[0].shape for arg in stacked_args):
+        return None
+
+    stacked, valid = func(*args)
+    return Vector.from_stacked(result_type, stacked, valid)
 
 
 # break naming conventions for consistent decorator naming
@@ -57,6 +199,11 @@ class reduce_all(_FunctionWrapper):
         return all(self.func(*args) for args in zip(*arg_tuples))
 
 
+@reduce_all
+def is_valid(value):
+    return value is not None
+
+
 class _ValueWrapper:
     """wrapped value with hash only dependent on value"""
 
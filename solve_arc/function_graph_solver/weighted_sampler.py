@@ -0,0 +1,148 @@
+"""
+weighted sampling with replacement from a growing set of items
+with changing weights, based on a fenwick tree (binary indexed tree),
+and from a fixed set of items with fixed weights, based on an alias table
+"""
+
+import numpy as np
+
+
+class WeightedSampler:
+    """sample items proportional to weight in O(log n), update weights in O(log n)"""
+
+    def __init__(self, items_with_weights=()):
+        self._items = []
+        self._weights = []
+        self._index = {}
+        # tree[i] holds sum of weights[i - lowbit(i) + 1 .. i] (1-based)
+        self._tree = [0.0]
+        self._num_positive = 0
+
+        for item, weight in items_with_weights:
+            self.add(item, weight)
+
+    def add(self, item, weight):
+        """add item or update weight of item which was already added"""
+        if item in self._index:
+            self.update(item, weight)
+            return
+
+        self._index[item] = len(self._items)
+        self._items.append(item)
+        self._weights.append(0.0)
+
+        # append tree node covering its range of preceding weights
+        position = len(self._items)
+        lowbit = position & -position
+        self._tree.append(
+            self._prefix_sum(position - 1) - self._prefix_sum(position - lowbit)
+        )
+
+        self.update(item, weight)
+
+    def update(self, item, weight):
+        assert weight >= 0, "weight must not be negative"
+        index = self._index[item]
+        delta = weight - self._weights[index]
+        self._num_positive += int(weight > 0) - int(self._weights[index] > 0)
+        self._weights[index] = weight
+
+        position = index + 1
+        while position < len(self._tree):
+            self._tree[position] += delta
+            position += position & -position
+
+    def weight(self, item):
+        return self._weights[self._index[item]]
+
+    @property
+    def total(self):
+        return self._prefix_sum(len(self._items))
+
+    def sample(self, random):
+        """draw single item with probability proportional to its weight"""
+        if self._num_positive == 0:
+            raise ValueError("no item with positive weight")
+
+        while True:
+            index = self._find(random.random() * self.total)
+            # guard against rounding errors of accumulated updates
+            if self._weights[index] > 0:
+                return self._items[index]
+
+    def choices(self, random, k=1):
+        """draw k items with replacement, like random.choices with weights"""
+        return [self.sample(random) for _ in range(k)]
+
+    def _prefix_sum(self, position):
+        """sum of first <position> weights"""
+        total = 0.0
+        while position > 0:
+            total += self._tree[position]
+            position -= position & -position
+        return total
+
+    def _find(self, value):
+        """index of item at which prefix sum exceeds value"""
+        position = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step > 0:
+            next_position = position + step
+            if next_position < len(self._tree) and self._tree[next_position] <= value:
+                position = next_position
+                value -= self._tree[next_position]
+            step >>= 1
+
+        return min(position, len(self._items) - 1)
+
+    @property
+    def num_positive(self):
+        """number of items with positive weight"""
+        return self._num_positive
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        return item in self._index
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+class AliasTable:
+    """sample items with fixed weights in O(1), in batches with numpy (alias method)"""
+
+    def __init__(self, items_with_weights):
+        items_with_weights = [
+            (item, weight) for item, weight in items_with_weights if weight > 0
+        ]
+        if len(items_with_weights) == 0:
+            raise ValueError("no item with positive weight")
+
+        self._items = [item for item, _ in items_with_weights]
+        weights = np.array([weight for _, weight in items_with_weights], dtype=float)
+
+        # split scaled weights into columns of height 1 holding at most two items
+        scaled = weights * len(weights) / weights.sum()
+        self._probabilities = np.ones(len(weights))
+        self._aliases = np.arange(len(weights))
+        small = [index for index, weight in enumerate(scaled) if weight < 1]
+        large = [index for index, weight in enumerate(scaled) if weight >= 1]
+        while len(small) > 0 and len(large) > 0:
+            index, alias = small.pop(), large.pop()
+            self._probabilities[index] = scaled[index]
+            self._aliases[index] = alias
+            scaled[alias] -= 1 - scaled[index]
+            (small if scaled[alias] < 1 else large).append(alias)
+        # remaining columns are full (up to rounding errors)
+
+    def choices(self, np_random, k=1):
+        """draw k items with replacement, like random.choices with weights"""
+        indices = np_random.randint(len(self._items), size=k)
+        use_alias = np_random.random_sample(k) >= self._probabilities[indices]
+        indices = np.where(use_alias, self._aliases[indices], indices)
+        return [self._items[index] for index in indices]
+
+    def __len__(self):
+        return len(self._items)
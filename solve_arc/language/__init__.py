@@ -1,6 +1,9 @@
 # core entities
 from .arguments import *
 
+# signatures and metadata of operations
+from .registry import *
+
 # operations
 from .logic import *
 from .selection import *
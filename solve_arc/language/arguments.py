@@ -1,3 +1,6 @@
+import functools
+import zlib
+
 import numpy as np
 from enum import IntEnum
 
@@ -17,8 +20,11 @@ class Color(IntEnum):
 
 # TODO: inherit from numpy array (?)
 class _Base:
+    # compact datatype of state, set by subclasses
+    dtype = None
+
     def __init__(self, state):
-        self.state = np.array(state, copy=True)
+        self.state = _immutable(state, self.dtype)
 
         assert len(self.state.shape) == 2, "state needs to be 2d array"
 
@@ -29,7 +35,7 @@ class _Base:
         return cls(elements)
 
     def copy(self):
-        return self.__class__(self.state)
+        return self.__class__(np.array(self.state))
 
     def enumerate(self):
         return np.ndenumerate(self.state)
@@ -40,11 +46,11 @@ class _Base:
 
     @property
     def width(self):
-        return self.state.shape[1]
+        return self.shape[1]
 
     @property
     def height(self):
-        return self.state.shape[0]
+        return self.shape[0]
 
     def __getitem__(self, *args, **kwargs):
         substate = self.state.__getitem__(*args, **kwargs)
@@ -55,12 +61,55 @@ class _Base:
         # return new grid for nonscalar values
         return self.__class__(substate)
 
+    @property
+    def digest(self):
+        """hash of state, computed once on first access"""
+        if not hasattr(self, "_digest"):
+            # only consider state for hash, crc is identical across processes.
+            # datatype distinguishes grids and selections with identical bytes
+            type_crc = zlib.crc32(np.dtype(self.dtype).str.encode())
+            self._digest = hash(self.shape) ^ zlib.crc32(
+                self._canonical_state().tobytes(), type_crc
+            )
+
+        return self._digest
+
+    def cached(self, key, compute):
+        """value derived from state, computed once as state is immutable"""
+        if not hasattr(self, "_cache"):
+            self._cache = {}
+
+        if key not in self._cache:
+            self._cache[key] = compute()
+
+        return self._cache[key]
+
     def __hash__(self):
-        # only consider state for hash
-        return hash(self.state.shape) ^ hash(self.state.tobytes())
+        return self.digest
 
     def __eq__(self, other):
-        return isinstance(other, self.__class__) and hash(self) == hash(other)
+        # compare digests first, exact comparison only to rule out collisions
+        return (
+            isinstance(other, self.__class__)
+            and self.digest == other.digest
+            and np.array_equal(self._canonical_state(), other._canonical_state())
+        )
+
+    def _canonical_state(self):
+        """state used for hashing and comparison"""
+        return self.state
+
+    def __getstate__(self):
+        # derived values can be recomputed, avoid transferring them
+        return {
+            name: value for name, value in self.__dict__.items() if name != "_cache"
+        }
+
+    def __setstate__(self, attributes):
+        self.__dict__.update(attributes)
+        for value in attributes.values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
 
     def __str__(self, str_element=str):
         return "\n".join(
@@ -76,18 +125,22 @@ class _Base:
 class Grid(_Base):
     """main representation of pixel grids for arc dataset inputs and outputs"""
 
+    # colors fit into single byte
+    dtype = np.uint8
+
     def __init__(self, state):
-        super().__init__(state)
+        state = np.asarray(state)
+        assert state.dtype.kind in ["i", "u"], "state datatype must be integral"
 
-        assert self.state.dtype.kind in ["i", "u"], "state datatype must be integral"
+        super().__init__(state)
 
     @classmethod
     def empty(cls, shape):
-        return cls(np.zeros(shape=shape, dtype=int))
+        return cls(np.zeros(shape=shape, dtype=cls.dtype))
 
     @classmethod
     def filled(cls, shape, color):
-        return cls(np.full(shape=shape, fill_value=color, dtype=int))
+        return cls(np.full(shape=shape, fill_value=color, dtype=cls.dtype))
 
     @classmethod
     def from_string(cls, string):
@@ -96,16 +149,63 @@ class Grid(_Base):
 
     def used_colors(self):
         """returns tuple of colors used in grid"""
-        return tuple(np.unique(self.state))
+        return self.cached("used_colors", lambda: tuple(np.unique(self.state)))
 
 
 class Selection(_Base):
     """representation of boolean masks for intermediate selections"""
 
+    dtype = np.bool_
+
     def __init__(self, state):
+        state = np.asarray(state)
+        assert state.dtype.kind == "b", "state datatype must be boolean"
+
         super().__init__(state)
 
-        assert self.state.dtype.kind == "b", "state datatype must be boolean"
+    @classmethod
+    def from_packed(cls, packed, shape):
+        """selection from state packed to bits (as by numpy.packbits)
+
+        state is only unpacked when accessed, bits beyond shape are ignored
+        """
+        selection = cls.__new__(cls)
+        selection._state = None
+        selection._shape = tuple(shape)
+        selection._packed = _immutable(
+            np.bitwise_and(packed, _padding_mask(shape[0] * shape[1])), np.uint8
+        )
+        return selection
+
+    @property
+    def state(self):
+        if self._state is None:
+            num_elements = self._shape[0] * self._shape[1]
+            state = np.unpackbits(self._packed, count=num_elements).view(bool)
+            self._state = _immutable(state.reshape(self._shape), self.dtype)
+
+        return self._state
+
+    @state.setter
+    def state(self, state):
+        self._state = state
+        self._shape = state.shape
+        self._packed = None
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def packed(self):
+        """state packed to bits, 8 elements per byte, computed once"""
+        if self._packed is None:
+            self._packed = _immutable(np.packbits(self._state), np.uint8)
+
+        return self._packed
+
+    def _canonical_state(self):
+        return self.packed
 
     @classmethod
     def empty(cls, shape):
@@ -130,12 +230,78 @@ class Selection(_Base):
 
     def any(self):
         """returns whether any element is true in selection"""
-        return np.any(self.state)
+        return self.count > 0
+
+    @property
+    def count(self):
+        """number of selected elements, computed once"""
+        return self.cached("count", lambda: int(np.sum(_POPCOUNT[self.packed])))
+
+    @property
+    def bounds(self):
+        """(top, left, bottom, right) of box bounding selected elements, None if empty"""
+        return self.cached("bounds", self._bounds)
+
+    @property
+    def touches_edge(self):
+        """returns whether any selected element is at the edge"""
+        bounds = self.bounds
+        if bounds is None:
+            return False
+
+        top, left, bottom, right = bounds
+        return top == 0 or left == 0 or bottom == self.height or right == self.width
+
+    def _bounds(self):
+        rows = np.flatnonzero(np.any(self.state, axis=1))
+        if len(rows) == 0:
+            return None
+
+        columns = np.flatnonzero(np.any(self.state, axis=0))
+        return int(rows[0]), int(columns[0]), int(rows[-1]) + 1, int(columns[-1]) + 1
+
+    def __getstate__(self):
+        # packed state is 8 times smaller
+        self.packed
+        attributes = super().__getstate__()
+        attributes["_state"] = None
+        return attributes
 
     def __str__(self):
         return super().__str__(str_element=lambda element: "#" if element else ".")
 
 
+# number of set bits for all byte values
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+@functools.lru_cache(maxsize=None)
+def _padding_mask(num_elements):
+    """mask of bits of packed state which belong to elements"""
+    mask = np.full((num_elements + 7) // 8, 0xFF, dtype=np.uint8)
+    if num_elements % 8 != 0:
+        mask[-1] = (0xFF << (8 - num_elements % 8)) & 0xFF
+    mask.flags.writeable = False
+    return mask
+
+
+def _immutable(state, dtype):
+    """read-only array of state, which is shared instead of copied where possible
+
+    values are shared between nodes and their digest is cached, so state must never change.
+    read-only arrays (i.e. views of other states) are used as they are, arrays owning their
+    data are made read-only in place (so the creator can not change them anymore either),
+    everything else is copied
+    """
+    state = np.asarray(state)
+
+    if state.dtype != dtype or (state.flags.writeable and not state.flags.owndata):
+        state = np.array(state, dtype=dtype)
+
+    state.flags.writeable = False
+    return state
+
+
 def filtered_elements(string):
     return (
         line.strip().split() for line in string.splitlines() if len(line.strip()) > 0
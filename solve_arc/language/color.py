@@ -1,31 +1,82 @@
+import functools
+
 import numpy as np
 
 from .arguments import *
+from .registry import *
 
 
+@register(
+    Grid, Grid, Color, Color, infer_shape=preserved_shape, infer_colors=switched_colors
+)
 def switch_color(grid, a, b):
-    mapped = grid.copy()
-    mapped.state[grid.state == a] = b
-    mapped.state[grid.state == b] = a
-    return mapped
+    return apply_color_table(grid, switch_color_table(a, b))
 
 
+@register(
+    Grid, Grid, Color, Color, infer_shape=preserved_shape, infer_colors=mapped_colors
+)
 def map_color(grid, from_, to):
-    mapped = grid.copy()
-    mapped.state[grid.state == from_] = to
-    return mapped
+    return apply_color_table(grid, map_color_table(from_, to))
 
 
+@register(
+    Grid,
+    Grid,
+    Selection,
+    Color,
+    Color,
+    preconditions=(same_shape,),
+    infer_shape=preserved_shape,
+    cost=2.0,
+)
 def map_color_in_selection(grid, selection, from_, to):
     if grid.shape != selection.shape:
         return None
 
-    mask = np.logical_and(selection.state, grid.state == from_)
-    mapped = grid.copy()
-    mapped.state[mask] = to
-    return mapped
+    mapped = map_color_table(from_, to)[grid.state]
+    return Grid(np.where(selection.state, mapped, grid.state))
+
+
+def apply_color_table(grid, table):
+    """remap all colors of grid with single lookup"""
+    return Grid(table[grid.state])
+
+
+def color_table(mapping=None):
+    """lookup table for all values of grid state, colors not in mapping stay unchanged"""
+    table = np.arange(256, dtype=Grid.dtype)
+    for from_, to in (mapping or {}).items():
+        table[from_] = to
+
+    table.flags.writeable = False
+    return table
+
+
+@functools.lru_cache(maxsize=None)
+def switch_color_table(a, b):
+    return color_table({a: b, b: a} if a != b else {})
+
+
+@functools.lru_cache(maxsize=None)
+def map_color_table(from_, to):
+    return color_table({from_: to})
+
+
+def compose_color_tables(first, second):
+    """table with same effect as applying first and then second table"""
+    return second[first]
 
 
+@register(
+    Grid,
+    Grid,
+    Selection,
+    Color,
+    preconditions=(same_shape,),
+    infer_shape=preserved_shape,
+    cost=2.0,
+)
 def set_selected_to_color(grid, selection, color):
     if grid.shape != selection.shape:
         return None
@@ -35,5 +86,6 @@ def set_selected_to_color(grid, selection, color):
     return Grid(changed + unchanged)
 
 
+@register(Grid, Grid, Color, infer_shape=preserved_shape, infer_colors=filled_colors)
 def fill_grid(grid, color):
-    return Grid.fill(grid.shape, color)
+    return Grid.filled(grid.shape, color)
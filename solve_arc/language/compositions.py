@@ -1,8 +1,10 @@
 import numpy as np
 
 from . import *
+from .objects import connected_objects
 
 
+@register(Grids, Grid, Color, cost=30.0)
 def extract_color_patches(grid, ignore=0):
     patches = []
     for color in grid.used_colors():
@@ -17,25 +19,24 @@ def extract_color_patches(grid, ignore=0):
     return Grids(patches)
 
 
+@register(Grid, Grid, Color, cost=8.0)
 def extract_color_patch(grid, color):
     selection = select_color(grid, color)
     return extract_selected_area(grid, selection)
 
 
+@register(Grids, Grid, Color, cost=70.0)
 def extract_islands(grid, ignore=0):
     selection = select_all_colors(grid, ignore)
-    if not selection.any():
-        return None
-
-    selection_islands = split_selection_into_connected_areas(selection)
 
-    # if no selection islands extract single selection
-    if selection_islands is None:
-        selection_islands = [selection]
+    # single area if selection is not split into connected areas
+    objects = connected_objects(selection)
+    if len(objects) == 0:
+        return None
 
     islands = []
-    for selection in selection_islands:
-        island = extract_selected_area(grid, selection)
+    for object_ in objects:
+        island = extract_selected_area(grid, object_.selection)
         if island is not None:
             islands.append(island)
 
@@ -1,39 +1,56 @@
 import numpy as np
 
 from .arguments import *
+from .registry import *
 
 
+@register(
+    Grid, Grid, Grid, preconditions=(same_shape,), infer_shape=preserved_shape, cost=2.0
+)
 def elementwise_equal_and(a, b):
-    if a.shape != b.shape:
-        return None
-
-    try:
-        return Grid(_elementwise_eand(a.state, b.state))
-    except ValueError:
-        return None
+    return _apply_lookup_table(_EQUAL_AND, a, b)
 
 
+@register(
+    Grid, Grid, Grid, preconditions=(same_shape,), infer_shape=preserved_shape, cost=2.0
+)
 def elementwise_equal_or(a, b):
-    if a.shape != b.shape:
-        return None
-
-    try:
-        return Grid(_elementwise_eor(a.state, b.state))
-    except ValueError:
-        return None
+    return _apply_lookup_table(_EQUAL_OR, a, b)
 
 
+@register(
+    Grid, Grid, Grid, preconditions=(same_shape,), infer_shape=preserved_shape, cost=3.0
+)
 def elementwise_xor(a, b):
+    return _apply_lookup_table(_XOR, a, b)
+
+
+def _apply_lookup_table(lookup_table, a, b):
+    """combine elements by color pair lookup, None if any pair is invalid"""
     if a.shape != b.shape:
         return None
 
-    try:
-        return Grid(_elementwise_xor(a.state, b.state))
-    except ValueError:
+    values, valid = lookup_table
+    if not np.all(valid[a.state, b.state]):
         return None
 
+    return Grid(values[a.state, b.state])
+
+
+def _lookup_table(combine):
+    """values and validity for all color pairs, combine returns None if invalid"""
+    values = np.zeros(shape=(len(Color), len(Color)), dtype=Grid.dtype)
+    valid = np.zeros(shape=(len(Color), len(Color)), dtype=bool)
+    for a in Color:
+        for b in Color:
+            combined = combine(a, b)
+            if combined is not None:
+                values[a, b] = combined
+                valid[a, b] = True
+
+    return values, valid
+
 
-@np.vectorize
 def _elementwise_eand(a, b):
     if a == 0:
         return 0
@@ -42,13 +59,10 @@ def _elementwise_eand(a, b):
     elif a == b:
         return a
     else:
-        raise ValueError(
-            "elements need to be equal or at least one of them needs to be 0, "
-            "but instead are {} and {}".format(a, b)
-        )
+        # elements need to be equal or at least one of them needs to be 0
+        return None
 
 
-@np.vectorize
 def _elementwise_eor(a, b):
     if a == 0:
         return b
@@ -57,13 +71,10 @@ def _elementwise_eor(a, b):
     elif a == b:
         return a
     else:
-        raise ValueError(
-            "elements need to be equal or at least one of them needs to be 0, "
-            "but instead are {} and {}".format(a, b)
-        )
+        # elements need to be equal or at least one of them needs to be 0
+        return None
 
 
-@np.vectorize
 def _elementwise_xor(a, b):
     if a == 0:
         return b
@@ -73,21 +84,71 @@ def _elementwise_xor(a, b):
         return 0
 
 
+_EQUAL_AND = _lookup_table(_elementwise_eand)
+_EQUAL_OR = _lookup_table(_elementwise_eor)
+_XOR = _lookup_table(_elementwise_xor)
+
+
+@register(
+    Selection,
+    Selection,
+    Selection,
+    preconditions=(same_shape,),
+    infer_shape=preserved_shape,
+    cost=2.0,
+)
 def selection_elementwise_and(a, b):
-    return Selection(np.logical_and(a.state, b.state))
+    if a.shape != b.shape:
+        return None
+
+    return Selection.from_packed(np.bitwise_and(a.packed, b.packed), a.shape)
 
 
+@register(
+    Selection,
+    Selection,
+    Selection,
+    preconditions=(same_shape,),
+    infer_shape=preserved_shape,
+    cost=2.0,
+)
 def selection_elementwise_or(a, b):
-    return Selection(np.logical_or(a.state, b.state))
+    if a.shape != b.shape:
+        return None
 
+    return Selection.from_packed(np.bitwise_or(a.packed, b.packed), a.shape)
 
+
+@register(
+    Selection,
+    Selection,
+    Selection,
+    preconditions=(same_shape,),
+    infer_shape=preserved_shape,
+    cost=2.0,
+)
 def selection_elementwise_xor(a, b):
-    return Selection(np.logical_xor(a.state, b.state))
+    if a.shape != b.shape:
+        return None
+
+    return Selection.from_packed(np.bitwise_xor(a.packed, b.packed), a.shape)
 
 
+@register(
+    Selection,
+    Selection,
+    Selection,
+    preconditions=(same_shape,),
+    infer_shape=preserved_shape,
+    cost=2.0,
+)
 def selection_elementwise_eq(a, b):
-    return Selection(a.state == b.state)
+    if a.shape != b.shape:
+        return None
+
+    return Selection.from_packed(np.invert(np.bitwise_xor(a.packed, b.packed)), a.shape)
 
 
+@register(Selection, Selection, infer_shape=preserved_shape, cost=1.5)
 def selection_elementwise_not(selection):
-    return Selection(np.invert(selection.state))
+    return Selection.from_packed(np.invert(selection.packed), selection.shape)
@@ -0,0 +1,138 @@
+"""
+object table of selections: connected areas with their bounding boxes, pixel
+counts and edge contact, computed once per selection and cached on it
+(as values are immutable)
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .arguments import *
+
+Object = namedtuple(
+    "Object", ["selection", "top", "left", "bottom", "right", "area", "touches_edge"]
+)
+
+# neighbor offsets of elements which are connected
+_CONNECTIVITIES = {
+    "all": np.array(
+        [(y, x) for y in range(-1, 2) for x in range(-1, 2) if (y, x) != (0, 0)]
+    ),
+    "no_diagonals": np.array([(-1, 0), (1, 0), (0, -1), (0, 1)]),
+    "skip_gaps": np.array(
+        [(y, x) for y in range(-2, 3) for x in range(-2, 3) if (y, x) != (0, 0)]
+    ),
+}
+
+
+def selection_object(selection):
+    """object of whole selection, None if nothing is selected"""
+    if not selection.any():
+        return None
+
+    return selection.cached(
+        "object",
+        lambda: Object(
+            selection, *selection.bounds, selection.count, selection.touches_edge
+        ),
+    )
+
+
+def connected_objects(selection, connectivity="all"):
+    """objects of connected areas of selection, ordered by their first element"""
+    return selection.cached(
+        ("connected_objects", connectivity),
+        lambda: _connected_objects(selection, _CONNECTIVITIES[connectivity]),
+    )
+
+
+def _connected_objects(selection, neighbors):
+    labels, num_areas = _label_connected_areas(selection.state, neighbors)
+
+    if num_areas == 0:
+        return ()
+
+    # single area is the selection itself
+    if num_areas == 1:
+        return (selection_object(selection),)
+
+    areas = labels == np.arange(1, num_areas + 1).reshape(-1, 1, 1)
+    # selections share the read-only areas instead of copying them
+    areas.flags.writeable = False
+
+    # bounding boxes and pixel counts of all areas at once
+    rows, columns = np.nonzero(labels)
+    area_indices = labels[rows, columns] - 1
+    tops = np.full(num_areas, selection.height)
+    lefts = np.full(num_areas, selection.width)
+    bottoms = np.zeros(num_areas, dtype=int)
+    rights = np.zeros(num_areas, dtype=int)
+    np.minimum.at(tops, area_indices, rows)
+    np.minimum.at(lefts, area_indices, columns)
+    np.maximum.at(bottoms, area_indices, rows + 1)
+    np.maximum.at(rights, area_indices, columns + 1)
+    counts = np.bincount(area_indices, minlength=num_areas)
+
+    objects = []
+    for index, area in enumerate(areas):
+        area_selection = Selection(area)
+        # geometry of area selections is already known
+        bounds = (
+            int(tops[index]),
+            int(lefts[index]),
+            int(bottoms[index]),
+            int(rights[index]),
+        )
+        area_selection.cached("bounds", lambda: bounds)
+        area_selection.cached("count", lambda: int(counts[index]))
+        objects.append(selection_object(area_selection))
+
+    return tuple(objects)
+
+
+def _label_connected_areas(mask, neighbors):
+    """label connected areas of mask with union-find on all neighbor pairs at once
+
+    returns array with labels 1..n (ordered by first element of area) and 0 for
+    unselected elements, and number of areas n
+    """
+    # pad to avoid wrapping around edges when looking up neighbors by flat index
+    padding = np.max(np.abs(neighbors))
+    padded = np.pad(mask, padding)
+    num_columns = padded.shape[1]
+
+    indices = np.flatnonzero(padded)
+    offsets = np.dot(neighbors, np.array([num_columns, 1]))
+    # only forward offsets, as connectivity is symmetric
+    offsets = offsets[offsets > 0]
+    neighbor_indices = (indices.reshape(-1, 1) + offsets.reshape(1, -1)).ravel()
+    sources = np.repeat(indices, len(offsets))
+    connected = padded.ravel()[neighbor_indices]
+    a, b = sources[connected], neighbor_indices[connected]
+
+    parents = np.arange(padded.size)
+    while True:
+        # hook roots of both ends to the smaller root
+        root_a, root_b = parents[a], parents[b]
+        low, high = np.minimum(root_a, root_b), np.maximum(root_a, root_b)
+        np.minimum.at(parents, high, low)
+
+        # compress paths until all elements point to their root
+        compressed = parents[parents]
+        while np.any(compressed != parents):
+            parents = compressed
+            compressed = parents[parents]
+
+        if np.all(parents[a] == parents[b]):
+            break
+
+    roots = parents[indices]
+    unique_roots, area_labels = np.unique(roots, return_inverse=True)
+    labels = np.zeros(padded.size, dtype=int)
+    labels[indices] = area_labels + 1
+    labels = labels.reshape(padded.shape)
+    labels = labels[
+        padding : padding + mask.shape[0], padding : padding + mask.shape[1]
+    ]
+    return labels, len(unique_roots)
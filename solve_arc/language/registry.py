@@ -0,0 +1,222 @@
+"""
+registry of operations with their signatures and metadata, from which the solvers
+build their candidate generation
+"""
+
+from collections import namedtuple
+
+from .arguments import Color
+
+
+class Operation(
+    namedtuple(
+        "Operation",
+        [
+            "function",
+            "result_type",
+            "arg_types",
+            "preconditions",
+            "infer_shape",
+            "infer_colors",
+            "deterministic",
+            "cost",
+        ],
+    )
+):
+    """signature and metadata of operation
+
+    arg_types: type or tuple of alternative types per argument, Color for scalars
+    preconditions: checks on arguments, which need to hold for a valid result
+    infer_shape: shape of result from shapes of non-scalar arguments, without
+        evaluation (see shape transfer functions below), None if not inferable
+    infer_colors: used colors of result from used colors of grid arguments and
+        values of scalar arguments (see color transfer functions below)
+    cost: runtime relative to color mapping of grid, measured on 10x10 grids
+    """
+
+    @property
+    def scalar_args(self):
+        """indices of scalar (i.e. color) arguments"""
+        return tuple(
+            index for index, arg_type in enumerate(self.arg_types) if arg_type is Color
+        )
+
+
+# function -> operation, in order of registration
+operations = {}
+
+
+def register(
+    result_type,
+    *arg_types,
+    preconditions=(),
+    infer_shape=None,
+    infer_colors=None,
+    deterministic=True,
+    cost=1.0
+):
+    """return decorator which registers function as operation with signature"""
+
+    def decorator(function):
+        operations[function] = Operation(
+            function,
+            result_type,
+            arg_types,
+            preconditions,
+            infer_shape,
+            infer_colors,
+            deterministic,
+            cost,
+        )
+        return function
+
+    return decorator
+
+
+def alternatives(arg_type):
+    """alternative types of argument in signature"""
+    return arg_type if isinstance(arg_type, tuple) else (arg_type,)
+
+
+def same_shape(*args):
+    """all arguments have same shape (elements of sequences need to match as well)"""
+    return _same(arg.shape for arg in args)
+
+
+def same_height(*args):
+    return _same(arg.height for arg in args)
+
+
+def same_width(*args):
+    return _same(arg.width for arg in args)
+
+
+def divisible_height(num_segments):
+    def divisible_height(arg):
+        return arg.height is not None and arg.height % num_segments == 0
+
+    return divisible_height
+
+
+def divisible_width(num_segments):
+    def divisible_width(arg):
+        return arg.width is not None and arg.width % num_segments == 0
+
+    return divisible_width
+
+
+def _same(values):
+    values = set(values)
+    return len(values) == 1 and None not in values
+
+
+class _Unknown:
+    """marker for properties of results, which depend on the values of the arguments"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+UNKNOWN_SHAPE = _Unknown("UNKNOWN_SHAPE")
+UNKNOWN_COLORS = _Unknown("UNKNOWN_COLORS")
+
+
+# shape transfer functions, which get the shapes of grids / selections and tuples of
+# shapes for sequences and return the shape of the result, None if result is invalid
+
+
+def preserved_shape(*shapes):
+    if any(shape != shapes[0] for shape in shapes[1:]):
+        return None
+
+    return shapes[0]
+
+
+def transposed_shape(shape):
+    height, width = shape
+    return width, height
+
+
+def concatenated_shape(axis):
+    """shape of concatenation along axis (0: top to bottom, 1: left to right)"""
+
+    def concatenated_shape(*shapes):
+        if any(shape[1 - axis] != shapes[0][1 - axis] for shape in shapes[1:]):
+            return None
+
+        concatenated = list(shapes[0])
+        concatenated[axis] = sum(shape[axis] for shape in shapes)
+        return tuple(concatenated)
+
+    return concatenated_shape
+
+
+def split_shape(axis, num_segments):
+    """shapes of segments of split along axis (0: top to bottom, 1: left to right)"""
+
+    def split_shape(shape):
+        if shape[axis] % num_segments != 0:
+            return None
+
+        segment = list(shape)
+        segment[axis] = shape[axis] // num_segments
+        return (tuple(segment),) * num_segments
+
+    return split_shape
+
+
+def of_elements(infer):
+    """apply shape or color transfer function to elements of sequence"""
+
+    def of_elements(elements):
+        if len(elements) == 0:
+            return None
+
+        return infer(*elements)
+
+    return of_elements
+
+
+def first_element(elements):
+    return elements[0] if len(elements) > 0 else None
+
+
+def last_element(elements):
+    return elements[-1] if len(elements) > 1 else None
+
+
+def sorted_by_area(shapes):
+    return tuple(sorted(shapes, key=lambda shape: shape[0] * shape[1]))
+
+
+# color transfer functions, which get the used colors of grids as frozensets
+# (UNKNOWN_COLORS for selections), tuples of them for sequences and the values of
+# scalar arguments and return the used colors of the result, None if result is invalid
+
+
+def preserved_colors(colors, *args):
+    return colors
+
+
+def switched_colors(colors, a, b):
+    return frozenset(
+        b if color == a else a if color == b else color for color in colors
+    )
+
+
+def mapped_colors(colors, from_, to):
+    return frozenset(to if color == from_ else color for color in colors)
+
+
+def filled_colors(colors, color):
+    return frozenset([color])
+
+
+def combined_colors(*colors):
+    if any(element is UNKNOWN_COLORS for element in colors):
+        return UNKNOWN_COLORS
+
+    return frozenset.union(*colors)
@@ -1,8 +1,10 @@
 import numpy as np
 
 from .arguments import *
+from .registry import *
 
 
+@register(Grids, Grid, Selections, preconditions=(same_shape,), cost=20.0)
 def extract_selected_areas(grid, selections):
     extracted_areas = []
     for selection in selections:
@@ -16,6 +18,7 @@ def extract_selected_areas(grid, selections):
     return Grids(extracted_areas)
 
 
+@register(Grid, Grid, Selection, preconditions=(same_shape,), cost=5.0)
 def extract_selected_area(grid, selection):
     """extract box bounding selection from grid"""
     if selection.shape != grid.shape:
@@ -24,10 +27,7 @@ def extract_selected_area(grid, selection):
     if not selection.any():
         return None
 
-    indices = np.argwhere(selection.state)
-
-    top, left = np.min(indices, axis=0)
-    bottom, right = np.max(indices, axis=0) + 1
+    top, left, bottom, right = selection.bounds
     patch = grid[top:bottom, left:right]
 
     if patch.shape == grid.shape:
@@ -37,6 +37,13 @@ def extract_selected_area(grid, selection):
     return patch
 
 
+@register(
+    Grids,
+    Grid,
+    preconditions=(divisible_width(2),),
+    infer_shape=split_shape(1, 2),
+    cost=3.0,
+)
 def split_left_right(grid):
     if grid.width % 2 != 0:
         return None
@@ -44,6 +51,13 @@ def split_left_right(grid):
     return Grids(Grid(split) for split in np.hsplit(grid.state, 2))
 
 
+@register(
+    Grids,
+    Grid,
+    preconditions=(divisible_width(3),),
+    infer_shape=split_shape(1, 3),
+    cost=4.0,
+)
 def split_left_middle_right(grid):
     if grid.width % 3 != 0:
         return None
@@ -51,6 +65,13 @@ def split_left_middle_right(grid):
     return Grids(Grid(split) for split in np.hsplit(grid.state, 3))
 
 
+@register(
+    Grids,
+    Grid,
+    preconditions=(divisible_height(2),),
+    infer_shape=split_shape(0, 2),
+    cost=4.0,
+)
 def split_top_bottom(grid):
     if grid.height % 2 != 0:
         return None
@@ -58,6 +79,13 @@ def split_top_bottom(grid):
     return Grids(Grid(split) for split in np.vsplit(grid.state, 2))
 
 
+@register(
+    Grids,
+    Grid,
+    preconditions=(divisible_height(3),),
+    infer_shape=split_shape(0, 3),
+    cost=3.0,
+)
 def split_top_middle_bottom(grid):
     if grid.height % 3 != 0:
         return None
@@ -65,6 +93,14 @@ def split_top_middle_bottom(grid):
     return Grids(Grid(split) for split in np.vsplit(grid.state, 3))
 
 
+@register(
+    Grid,
+    Grid,
+    Grid,
+    preconditions=(same_height,),
+    infer_shape=concatenated_shape(1),
+    infer_colors=combined_colors,
+)
 def concatenate_left_right(a, b):
     if a.height != b.height:
         return None
@@ -72,6 +108,14 @@ def concatenate_left_right(a, b):
     return Grid(np.hstack([a.state, b.state]))
 
 
+@register(
+    Grid,
+    Grid,
+    Grid,
+    preconditions=(same_width,),
+    infer_shape=concatenated_shape(0),
+    infer_colors=combined_colors,
+)
 def concatenate_top_bottom(a, b):
     if a.width != b.width:
         return None
@@ -79,6 +123,14 @@ def concatenate_top_bottom(a, b):
     return Grid(np.vstack([a.state, b.state]))
 
 
+@register(
+    Grid,
+    Grids,
+    preconditions=(same_height,),
+    infer_shape=of_elements(concatenated_shape(1)),
+    infer_colors=of_elements(combined_colors),
+    cost=2.0,
+)
 def concatenate_left_to_right(grids):
     if grids.height is None:
         return None
@@ -86,6 +138,14 @@ def concatenate_left_to_right(grids):
     return Grid(np.hstack([grid.state for grid in grids]))
 
 
+@register(
+    Grid,
+    Grids,
+    preconditions=(same_width,),
+    infer_shape=of_elements(concatenated_shape(0)),
+    infer_colors=of_elements(combined_colors),
+    cost=2.0,
+)
 def concatenate_top_to_bottom(grids):
     if grids.width is None:
         return None
@@ -93,6 +153,14 @@ def concatenate_top_to_bottom(grids):
     return Grid(np.vstack([grid.state for grid in grids]))
 
 
+@register(
+    Grid,
+    Grid,
+    Grid,
+    Selection,
+    preconditions=(same_shape,),
+    infer_shape=preserved_shape,
+)
 def merge_grids_with_mask(a, b, mask):
     if not (a.shape == b.shape == mask.shape):
         return None
@@ -100,6 +168,13 @@ def merge_grids_with_mask(a, b, mask):
     return Grid(np.where(mask.state, a.state, b.state))
 
 
+@register(
+    (Grid, Selection),
+    (Grids, Selections),
+    infer_shape=first_element,
+    infer_colors=first_element,
+    cost=0.05,
+)
 def take_first(sequence):
     if len(sequence) == 0:
         return None
@@ -107,6 +182,13 @@ def take_first(sequence):
     return sequence[0]
 
 
+@register(
+    (Grid, Selection),
+    (Grids, Selections),
+    infer_shape=last_element,
+    infer_colors=last_element,
+    cost=0.05,
+)
 def take_last(sequence):
     if len(sequence) < 2:
         return None
@@ -114,12 +196,16 @@ def take_last(sequence):
     return sequence[-1]
 
 
+@register(
+    (Grids, Selections), (Grids, Selections), infer_shape=sorted_by_area, cost=0.4
+)
 def sort_by_area(sequence):
     return sequence.__class__(
         sorted(sequence, key=lambda element: element.shape[0] * element.shape[1])
     )
 
 
+@register(Grid, Grids, cost=4.0)
 def take_grid_with_unique_colors(grids):
     # no definition of uniqueness for less than 3 elements
     if len(grids) < 3:
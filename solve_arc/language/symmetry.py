@@ -1,70 +1,190 @@
 import numpy as np
 
 from .arguments import *
-from .segmentation import extract_selected_area
+from .registry import *
 
 
+@register(
+    Grid, Grid, infer_shape=preserved_shape, infer_colors=preserved_colors, cost=13.0
+)
 def flip_up_down(grid):
-    return Grid(np.flipud(grid.state))
+    return orbit(grid)["flip_up_down"]
 
 
+@register(
+    Grid, Grid, infer_shape=preserved_shape, infer_colors=preserved_colors, cost=13.0
+)
 def flip_left_right(grid):
-    return Grid(np.fliplr(grid.state))
+    return orbit(grid)["flip_left_right"]
 
 
+@register(
+    Grid, Grid, infer_shape=transposed_shape, infer_colors=preserved_colors, cost=13.0
+)
 def rotate_90(grid):
-    return Grid(np.rot90(grid.state, k=1))
+    return orbit(grid)["rotate_90"]
 
 
+@register(
+    Grid, Grid, infer_shape=preserved_shape, infer_colors=preserved_colors, cost=13.0
+)
 def rotate_180(grid):
-    return Grid(np.rot90(grid.state, k=2))
+    return orbit(grid)["rotate_180"]
 
 
+@register(
+    Grid, Grid, infer_shape=transposed_shape, infer_colors=preserved_colors, cost=13.0
+)
 def rotate_270(grid):
-    return Grid(np.rot90(grid.state, k=3))
-
-
+    return orbit(grid)["rotate_270"]
+
+
+@register(
+    Grid,
+    Grid,
+    Selection,
+    preconditions=(same_shape,),
+    infer_shape=preserved_shape,
+    infer_colors=preserved_colors,
+    cost=5.0,
+)
 def flip_up_down_within_bounds(grid, selection):
-    return _transform_within_bounds(grid, selection, np.flipud)
-
-
+    return _transform_within_bounds(grid, selection, "flip_up_down")
+
+
+@register(
+    Grid,
+    Grid,
+    Selection,
+    preconditions=(same_shape,),
+    infer_shape=preserved_shape,
+    infer_colors=preserved_colors,
+    cost=5.0,
+)
 def flip_left_right_within_bounds(grid, selection):
-    return _transform_within_bounds(grid, selection, np.fliplr)
-
-
+    return _transform_within_bounds(grid, selection, "flip_left_right")
+
+
+@register(
+    Grid,
+    Grid,
+    Selection,
+    preconditions=(same_shape,),
+    infer_shape=preserved_shape,
+    infer_colors=preserved_colors,
+    cost=5.0,
+)
 def rotate_90_within_bounds(grid, selection):
-    return _transform_within_bounds(grid, selection, np.rot90, k=1)
-
-
+    return _transform_within_bounds(grid, selection, "rotate_90")
+
+
+@register(
+    Grid,
+    Grid,
+    Selection,
+    preconditions=(same_shape,),
+    infer_shape=preserved_shape,
+    infer_colors=preserved_colors,
+    cost=5.0,
+)
 def rotate_180_within_bounds(grid, selection):
-    return _transform_within_bounds(grid, selection, np.rot90, k=2)
-
-
+    return _transform_within_bounds(grid, selection, "rotate_180")
+
+
+@register(
+    Grid,
+    Grid,
+    Selection,
+    preconditions=(same_shape,),
+    infer_shape=preserved_shape,
+    infer_colors=preserved_colors,
+    cost=5.0,
+)
 def rotate_270_within_bounds(grid, selection):
-    return _transform_within_bounds(grid, selection, np.rot90, k=3)
+    return _transform_within_bounds(grid, selection, "rotate_270")
 
 
-def _transform_within_bounds(grid, selection, func, *args, **kwargs):
+def _transform_within_bounds(grid, selection, symmetry):
     if selection.shape != grid.shape:
         return None
 
     if not selection.any():
         return None
 
-    indices = np.argwhere(selection.state)
-    top, left = np.min(indices, axis=0)
-    bottom, right = np.max(indices, axis=0) + 1
-    patch = grid.state[top:bottom, left:right]
-
-    if patch.shape == grid.shape:
+    bounds = selection.bounds
+    top, left, bottom, right = bounds
+    if (bottom - top, right - left) == grid.shape:
         # was a pointless selection, just use original grid instead
         return None
 
-    transformed = func(patch, *args, **kwargs)
+    # patches are shared by selections with same bounds
+    patch = grid.cached(("patch", bounds), lambda: grid[top:bottom, left:right])
+    transformed = orbit(patch)[symmetry]
 
     if transformed.shape != patch.shape:
         return None
 
-    patched = grid.copy()
-    patched.state[top:bottom, left:right] = transformed
-    return patched
+    patched = np.array(grid.state)
+    patched[top:bottom, left:right] = transformed.state
+    return Grid(patched)
+
+
+# all elements of dihedral group of the square as transformations of states
+_SYMMETRIES = {
+    "identity": lambda state: state,
+    "rotate_90": lambda state: np.rot90(state, k=1),
+    "rotate_180": lambda state: np.rot90(state, k=2),
+    "rotate_270": lambda state: np.rot90(state, k=3),
+    "flip_up_down": np.flipud,
+    "flip_left_right": np.fliplr,
+    "transpose": np.transpose,
+    "anti_transpose": lambda state: np.rot90(state, k=2).T,
+}
+
+
+def orbit(grid):
+    """all symmetry transformations of grid by name, computed once as views of its state"""
+
+    def transform_all():
+        transformed = {
+            symmetry: Grid(transform(grid.state))
+            for symmetry, transform in _SYMMETRIES.items()
+            if symmetry != "identity"
+        }
+        transformed["identity"] = grid
+        # digest all at once while state is in cache
+        for element in transformed.values():
+            element.digest
+
+        return transformed
+
+    return grid.cached("orbit", transform_all)
+
+
+def compose_symmetries(first, second):
+    """symmetry with same effect as transforming with first and then second"""
+    return _COMPOSITIONS[first, second]
+
+
+def _compositions():
+    # all transformations of an asymmetric state are distinct
+    reference = np.arange(6).reshape(2, 3)
+    transformed = {
+        symmetry: transform(reference) for symmetry, transform in _SYMMETRIES.items()
+    }
+
+    def symmetry_of(state):
+        return next(
+            symmetry
+            for symmetry, other in transformed.items()
+            if other.shape == state.shape and np.array_equal(other, state)
+        )
+
+    return {
+        (first, second): symmetry_of(_SYMMETRIES[second](transformed[first]))
+        for first in _SYMMETRIES
+        for second in _SYMMETRIES
+    }
+
+
+_COMPOSITIONS = _compositions()
@@ -1,3 +1,6 @@
+import pickle
+
+import numpy as np
 import pytest
 
 from .arguments import *
@@ -83,9 +86,80 @@ def test_grid_copy():
 
     copy = grid.copy()
     assert copy == grid
+    assert copy.state is not grid.state
+
+
+def test_grid_immutable():
+    grid = Grid([[1, 2], [3, 4]])
+
+    with pytest.raises(ValueError):
+        grid.state[0, 0] = 9
+
+
+def test_grid_uint8():
+    grid = Grid([[1, 2], [3, 4]])
+
+    assert grid.state.dtype == np.uint8
+    assert Grid.empty(shape=(2, 2)).state.dtype == np.uint8
+    assert Grid.filled(shape=(2, 2), color=3).state.dtype == np.uint8
+
+
+def test_grid_shares_read_only_views():
+    grid = Grid([[1, 2], [3, 4]])
+
+    flipped = Grid(np.flipud(grid.state))
+    patch = grid[0:1, :]
+
+    assert np.shares_memory(flipped.state, grid.state)
+    assert np.shares_memory(patch.state, grid.state)
+    assert patch == Grid([[1, 2]])
+
 
-    grid.state[0, 0] = 9
-    assert copy != grid
+def test_grid_copies_writeable_views():
+    array = np.array([[1, 2], [3, 4]], dtype=np.uint8)
+
+    grid = Grid(array[:, :1])
+    array[0, 0] = 9
+
+    assert grid == Grid([[1], [3]])
+
+
+def test_grid_freezes_owned_array():
+    array = np.array([[1, 2], [3, 4]], dtype=np.uint8)
+
+    grid = Grid(array)
+
+    assert grid.state is array
+    with pytest.raises(ValueError):
+        array[0, 0] = 9
+
+
+def test_grid_inequality__selection_with_identical_bytes():
+    grid = Grid([[1, 1]])
+    selection = Selection([[True, True]])
+
+    assert grid.digest != selection.digest
+
+
+def test_grid_equality__digest_cached():
+    a = Grid([[1, 2], [3, 4]])
+    b = Grid(np.array([[1, 2], [3, 4]]))
+
+    assert a.digest == b.digest
+    assert a == b
+    assert hash(a) == a.digest
+
+
+def test_grid_pickle():
+    grid = Grid([[1, 2], [3, 4]])
+    hash(grid)
+
+    unpickled = pickle.loads(pickle.dumps(grid))
+
+    assert unpickled == grid
+    assert unpickled.digest == grid.digest
+    with pytest.raises(ValueError):
+        unpickled.state[0, 0] = 9
 
 
 def test_grid_enumerate():
@@ -133,6 +207,73 @@ def test_selection_any():
     assert not Selection([[False, False]]).any()
 
 
+def test_selection_geometry():
+    selection = Selection.from_string(
+        """
+        . . . .
+        . # . .
+        . . # .
+        . . . .
+        """
+    )
+
+    assert selection.count == 2
+    assert selection.bounds == (1, 1, 3, 3)
+    assert not selection.touches_edge
+    assert selection.bounds is selection.bounds
+
+
+def test_selection_geometry__touches_edge():
+    selection = Selection.from_string(
+        """
+        . . .
+        . . #
+        """
+    )
+
+    assert selection.bounds == (1, 2, 2, 3)
+    assert selection.touches_edge
+
+
+def test_selection_geometry__empty():
+    selection = Selection.empty(shape=(2, 2))
+
+    assert selection.count == 0
+    assert selection.bounds is None
+    assert not selection.touches_edge
+
+
+def test_selection_packed():
+    selection = Selection([[True, False, True], [False, False, True], [True] * 3])
+
+    unpacked = Selection.from_packed(selection.packed, selection.shape)
+
+    assert selection.packed.nbytes == 2
+    assert unpacked == selection
+    assert hash(unpacked) == hash(selection)
+    assert unpacked.count == 6
+    assert np.array_equal(unpacked.state, selection.state)
+
+
+def test_selection_packed__ignore_padding():
+    selection = Selection.from_packed(np.array([0xFF], dtype=np.uint8), (1, 3))
+
+    assert selection == Selection([[True, True, True]])
+    assert selection.count == 3
+
+
+def test_selection_pickle__packed():
+    selection = Selection([[True, False], [False, True]])
+
+    unpickled = pickle.loads(pickle.dumps(selection))
+
+    assert unpickled._state is None
+    assert unpickled == selection
+    assert unpickled.state[1, 1]
+    with pytest.raises(ValueError):
+        unpickled.state[0, 0] = False
+
+
 def test_selection_create_from_indices():
     selection = Selection.from_indices(
         shape=(3, 2), indices=[(0, 0), (0, 1), (1, 1), (2, 0)]
@@ -173,9 +314,9 @@ def test_sequence_apply():
     grids = Grids([Grid([[1, 2]]), Grid([[3, 4]])])
 
     def set_first_element_zero(grid):
-        grid = grid.copy()
-        grid.state[0, 0] = 0
-        return grid
+        state = np.array(grid.state)
+        state[0, 0] = 0
+        return Grid(state)
 
     applied = grids.apply(set_first_element_zero)
 
@@ -29,6 +29,21 @@ def test_switch_color__to_black(example_grid, example_selection):
     assert set_selected_to_color(example_grid, example_selection, 0) == expected_grid
 
 
+def test_switch_color__same_color(example_grid):
+    assert switch_color(example_grid, 1, 1) == example_grid
+
+
+def test_compose_color_tables(example_grid):
+    first = map_color_table(1, 2)
+    second = switch_color_table(2, 3)
+
+    composed = compose_color_tables(first, second)
+
+    assert apply_color_table(example_grid, composed) == switch_color(
+        map_color(example_grid, 1, 2), 2, 3
+    )
+
+
 def test_map_color(example_grid):
     expected_grid = Grid([[0, 2, 3], [4, 5, 6], [7, 8, 9]])
     assert map_color(example_grid, 1, 0) == expected_grid
@@ -89,3 +89,39 @@ def test_selection_elementwise_not():
     selection = Selection([[True, False]])
 
     assert selection_elementwise_not(selection) == Selection([[False, True]])
+
+
+def test_selection_elementwise_not__unpacked_state():
+    selection = Selection([[True, False, True], [False, False, True]])
+
+    inverted = selection_elementwise_not(selection)
+
+    assert inverted.count == 3
+    assert np.array_equal(inverted.state, np.invert(selection.state))
+
+
+def test_selection_elementwise_operations__different_shapes():
+    a = Selection([[True, False]])
+    b = Selection([[True], [False]])
+
+    assert selection_elementwise_and(a, b) is None
+    assert selection_elementwise_or(a, b) is None
+    assert selection_elementwise_xor(a, b) is None
+    assert selection_elementwise_eq(a, b) is None
+
+
+def test_elementwise_operations__all_color_pairs():
+    colors = np.arange(10)
+    a = Grid(np.repeat(colors, 10).reshape(10, 10))
+    b = Grid(np.tile(colors, 10).reshape(10, 10))
+
+    # only xor is defined for all color pairs
+    assert elementwise_equal_and(a, b) is None
+    assert elementwise_equal_or(a, b) is None
+    assert elementwise_xor(a, b) == Grid(
+        np.where(a.state == 0, b.state, np.where(b.state == 0, a.state, 0))
+    )
+
+    equal = Grid(np.where(b.state == 0, 0, a.state))
+    assert elementwise_equal_and(equal, a) == equal
+    assert elementwise_equal_or(equal, a) == a
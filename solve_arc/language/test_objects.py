@@ -0,0 +1,84 @@
+import pickle
+
+import pytest
+
+from .arguments import *
+from .objects import *
+
+
+@pytest.fixture
+def selection():
+    return Selection.from_string(
+        """
+        # # . . .
+        . . . # .
+        . . . # .
+        . . . . .
+        """
+    )
+
+
+def test_selection_object(selection):
+    object_ = selection_object(selection)
+
+    assert object_.selection is selection
+    assert _bounds(object_) == (0, 0, 3, 4)
+    assert object_.area == 4
+    assert object_.touches_edge
+
+
+def test_selection_object__empty():
+    assert selection_object(Selection.empty((2, 2))) is None
+
+
+def test_connected_objects(selection):
+    objects = connected_objects(selection, "no_diagonals")
+
+    assert len(objects) == 2
+    assert objects[0].selection == Selection.from_string(
+        """
+        # # . . .
+        . . . . .
+        . . . . .
+        . . . . .
+        """
+    )
+    assert _bounds(objects[0]) == (0, 0, 1, 2)
+    assert objects[0].area == 2
+    assert objects[0].touches_edge
+    assert _bounds(objects[1]) == (1, 3, 3, 4)
+    assert objects[1].area == 2
+    assert not objects[1].touches_edge
+    # objects of areas are cached on their selections
+    assert selection_object(objects[1].selection) is objects[1]
+
+
+def test_connected_objects__cached(selection):
+    objects = connected_objects(selection, "no_diagonals")
+
+    assert connected_objects(selection, "no_diagonals") is objects
+    assert connected_objects(selection, "skip_gaps") is not objects
+
+
+def test_connected_objects__single_area(selection):
+    objects = connected_objects(selection, "skip_gaps")
+
+    assert len(objects) == 1
+    assert objects[0].selection is selection
+
+
+def test_connected_objects__empty():
+    assert connected_objects(Selection.empty((2, 2))) == ()
+
+
+def test_cache_not_pickled(selection):
+    connected_objects(selection)
+
+    unpickled = pickle.loads(pickle.dumps(selection))
+
+    assert unpickled == selection
+    assert not hasattr(unpickled, "_cache")
+
+
+def _bounds(object_):
+    return object_.top, object_.left, object_.bottom, object_.right
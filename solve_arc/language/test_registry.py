@@ -0,0 +1,46 @@
+import inspect
+
+from . import *
+
+
+def test_operations__match_function_signatures():
+    assert len(operations) > 0
+
+    for function, operation in operations.items():
+        assert operation.function is function
+        parameters = inspect.signature(function).parameters
+        assert len(operation.arg_types) == len(parameters), function.__name__
+
+
+def test_operation__scalar_args():
+    assert operations[map_color_in_selection].scalar_args == (2, 3)
+    assert operations[flip_up_down].scalar_args == ()
+
+
+def test_same_shape():
+    a = Grid([[1, 2]])
+    b = Selection([[True, False]])
+    c = Grid([[1], [2]])
+
+    assert same_shape(a, b)
+    assert not same_shape(a, c)
+    assert same_shape(Grids([a, a]))
+    assert not same_shape(Grids([a, c]))
+
+
+def test_same_height_and_width():
+    a = Grid([[1, 2]])
+    b = Grid([[1, 2, 3]])
+
+    assert same_height(a, b)
+    assert not same_width(a, b)
+    assert same_height(Grids([a, b]))
+    assert not same_width(Grids([a, b]))
+
+
+def test_divisible():
+    grid = Grid([[1, 2, 3, 4]])
+
+    assert divisible_width(2)(grid)
+    assert not divisible_width(3)(grid)
+    assert not divisible_height(2)(grid)
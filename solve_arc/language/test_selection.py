@@ -121,6 +121,52 @@ def test_split_selection_into_connected_areas_no_diagonals(example_selection):
     }
 
 
+def test_split_selection_into_connected_areas__winding_areas():
+    # areas which need several passes to be merged
+    selection = Selection.from_string(
+        """
+        # # # # # .
+        . . . . # .
+        # # # . # .
+        # . # # # .
+        # . . . . #
+        # # # # . #
+        """
+    )
+
+    areas = split_selection_into_connected_areas_no_diagonals(selection)
+
+    assert areas == Selections(
+        [
+            Selection.from_string(
+                """
+                # # # # # .
+                . . . . # .
+                # # # . # .
+                # . # # # .
+                # . . . . .
+                # # # # . .
+                """
+            ),
+            Selection.from_string(
+                """
+                . . . . . .
+                . . . . . .
+                . . . . . .
+                . . . . . .
+                . . . . . #
+                . . . . . #
+                """
+            ),
+        ]
+    )
+    assert split_selection_into_connected_areas(selection) is None
+
+
+def test_split_selection_into_connected_areas__empty():
+    assert split_selection_into_connected_areas(Selection.empty((3, 3))) is None
+
+
 @pytest.fixture
 def example_selection__with_large_gaps():
     return Selection.from_string(
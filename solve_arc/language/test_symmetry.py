@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 
 from .arguments import *
@@ -23,6 +24,36 @@ def test_rotate(example_grid):
     assert rotate_270(example_grid) == Grid([[3, 1], [4, 2]])
 
 
+def test_orbit(example_grid):
+    grids = orbit(example_grid)
+
+    assert len(grids) == 8
+    assert grids["identity"] is example_grid
+    assert grids["transpose"] == Grid([[1, 3], [2, 4]])
+    assert grids["anti_transpose"] == Grid([[4, 2], [3, 1]])
+    assert len(set(grids.values())) == 8
+    # cached and sharing state of grid
+    assert orbit(example_grid) is grids
+    assert rotate_90(example_grid) is grids["rotate_90"]
+    assert np.shares_memory(grids["rotate_90"].state, example_grid.state)
+
+
+def test_compose_symmetries():
+    assert compose_symmetries("rotate_90", "rotate_270") == "identity"
+    assert compose_symmetries("flip_up_down", "flip_up_down") == "identity"
+    assert compose_symmetries("rotate_90", "rotate_90") == "rotate_180"
+    assert compose_symmetries("flip_up_down", "flip_left_right") == "rotate_180"
+
+
+def test_compose_symmetries__matches_transformations():
+    grid = Grid([[1, 2, 3], [4, 5, 6]])
+
+    for first, first_grid in orbit(grid).items():
+        for second in orbit(grid).keys():
+            composed = compose_symmetries(first, second)
+            assert orbit(first_grid)[second] == orbit(grid)[composed]
+
+
 @pytest.fixture
 def grid_with_island():
     return Grid.from_string(
@@ -3,9 +3,19 @@ from .hashable_partial import partial
 from ..language import *
 
 
-_extract_islands = expect_scalar(on_error_return=None)(extract_islands)
-_extract_color_patches = expect_scalar(on_error_return=None)(extract_color_patches)
-_extract_color_patch = expect_scalar(on_error_return=None)(extract_color_patch)
+def _expect_grids(operation):
+    """wrap operation to safely extract its grid arguments, as in its signature"""
+    arg_types = operations[operation].arg_types
+    num_grids = len([arg_type for arg_type in arg_types if arg_type is Grid])
+    if num_grids == 1:
+        return expect_scalar(on_error_return=None)(operation)
+
+    return expect_tuple(length=num_grids, on_error_return=None)(operation)
+
+
+_extract_islands = _expect_grids(extract_islands)
+_extract_color_patches = _expect_grids(extract_color_patches)
+_extract_color_patch = _expect_grids(extract_color_patch)
 
 
 @expect_scalar(on_error_return=[])
@@ -23,13 +33,9 @@ def parameterize_segmentation(grid):
     return extract_islands_functions + extract_color_patches_functions
 
 
-_elementwise_equal_and = expect_tuple(length=2, on_error_return=None)(
-    elementwise_equal_and
-)
-_elementwise_equal_or = expect_tuple(length=2, on_error_return=None)(
-    elementwise_equal_or
-)
-_elementwise_xor = expect_tuple(length=2, on_error_return=None)(elementwise_xor)
+_elementwise_equal_and = _expect_grids(elementwise_equal_and)
+_elementwise_equal_or = _expect_grids(elementwise_equal_or)
+_elementwise_xor = _expect_grids(elementwise_xor)
 
 
 @expect_tuple(length=2, on_error_return=[])
@@ -44,7 +50,7 @@ def parameterize_logic(a, b):
     ]
 
 
-_switch_color = expect_scalar(on_error_return=None)(switch_color)
+_switch_color = _expect_grids(switch_color)
 
 
 @expect_scalar(on_error_return=[])